@@ -0,0 +1,150 @@
+"""Micro-benchmark: records cleaned per second by the compiled per-type schemas
+versus the key-probing dispatch clean_data used before them.
+
+Run from the repository root:
+    python benchmarks/bench_clean.py
+"""
+import os, random, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # the swapi_echo package of this checkout, installed or not
+
+import swapi_echo as swapi
+from swapi_echo.clean import (
+    convert_string_to_float, convert_string_to_int, convert_string_to_list, filter_data, is_unknown)
+from swapi_echo.config import (
+    HOTH_KEYS, PEOPLE_KEYS, PLANET_KEYS, SPECIES_KEYS, STARSHIP_KEYS, VEHICLE_KEYS, dict_props,
+    float_props, int_props, list_props)
+
+
+def legacy_clean_data(entity, resolver):
+    """The key-probing dispatch clean_data replaced by the compiled schemas,
+    kept as the 'before' reference.
+    """
+    clean_dict = {}
+    if 'gender' in entity:
+        entity = filter_data(entity, PEOPLE_KEYS)
+    elif 'surface_water' in entity:
+        entity = filter_data(entity, HOTH_KEYS)
+    elif 'starship_class' in entity:
+        entity = filter_data(entity, STARSHIP_KEYS)
+    elif 'classification' in entity:
+        entity = filter_data(entity, SPECIES_KEYS)
+    elif 'vehicle_class' in entity:
+        entity = filter_data(entity, VEHICLE_KEYS)
+    for key, value in entity.items():
+        if type(value) == str:
+            if is_unknown(value):
+                clean_dict[key] = None
+            elif key in int_props:
+                clean_dict[key] = convert_string_to_int(value)
+            elif key in float_props:
+                if key == 'gravity':
+                    value = value.rstrip()
+                clean_dict[key] = convert_string_to_float(value)
+            elif key in list_props:
+                clean_dict[key] = convert_string_to_list(value)
+            elif key in dict_props:
+                if key == 'homeworld':
+                    clean_dict[key] = resolver.resolve(value, PLANET_KEYS)
+            else:
+                clean_dict[key] = value
+        elif key == 'species':
+            clean_dict['species'] = [resolver.resolve(value[0], SPECIES_KEYS)]
+        else:
+            clean_dict[key] = value
+    return clean_dict
+
+
+def synthetic_entities(count, seed=0):
+    """Builds raw SWAPI-shaped people, planets, starships, species and vehicles.
+
+    Parameters:
+        count (int): number of entities.
+        seed (int): random seed.
+
+    Returns:
+        list: raw entities.
+    """
+    rng = random.Random(seed)
+    number = lambda: rng.choice(['unknown', 'n/a', str(rng.randint(1, 10 ** 9)), '1,000'])
+    makers = [
+        lambda i: {'url': f'https://swapi.co/api/people/{i}/', 'name': f'Person {i}',
+                   'height': number(), 'mass': number(), 'hair_color': 'brown, grey',
+                   'skin_color': 'fair', 'eye_color': 'blue', 'birth_year': '19BBY',
+                   'gender': 'male', 'homeworld': 'https://swapi.co/api/planets/1/',
+                   'species': ['https://swapi.co/api/species/1/'], 'films': [], 'created': 'x'},
+        lambda i: {'url': f'https://swapi.co/api/planets/{i}/', 'name': f'Planet {i}',
+                   'rotation_period': number(), 'orbital_period': number(), 'diameter': number(),
+                   'climate': 'arid, temperate', 'gravity': '1 standard', 'terrain': 'desert, mountains',
+                   'surface_water': number(), 'population': number(), 'residents': []},
+        lambda i: {'url': f'https://swapi.co/api/starships/{i}/', 'name': f'Ship {i}',
+                   'model': 'T-65 X-wing', 'manufacturer': 'Incom', 'starship_class': 'Starfighter',
+                   'length': '12.5', 'max_atmosphering_speed': number(), 'hyperdrive_rating': '1.0',
+                   'MGLT': number(), 'crew': number(), 'passengers': number(),
+                   'cargo_capacity': number(), 'consumables': '1 week', 'pilots': []},
+        lambda i: {'url': f'https://swapi.co/api/species/{i}/', 'name': f'Species {i}',
+                   'classification': 'mammal', 'designation': 'sentient', 'average_height': number(),
+                   'skin_colors': 'caucasian, black, asian', 'hair_colors': 'blonde, brown',
+                   'eye_colors': 'brown, blue', 'average_lifespan': number(), 'language': 'Basic'},
+        lambda i: {'url': f'https://swapi.co/api/vehicles/{i}/', 'name': f'Vehicle {i}',
+                   'model': 't-47 airspeeder', 'manufacturer': 'Incom', 'vehicle_class': 'airspeeder',
+                   'length': '4.5', 'max_atmosphering_speed': number(), 'crew': number(),
+                   'passengers': number(), 'cargo_capacity': number(), 'consumables': 'none'},
+    ]
+    return [makers[i % len(makers)](i) for i in range(count)]
+
+
+def synthetic_resolver():
+    """Returns a Resolver answering the homeworld and species links of
+    synthetic_entities() with synthetic records instead of the network.
+    """
+    references = {
+        'https://swapi.co/api/planets/1/': synthetic_entities(2)[1],
+        'https://swapi.co/api/species/1/': synthetic_entities(4)[3],
+    }
+    return swapi.Resolver(lambda url: references[url])
+
+
+def records_per_second(clean, entities, resolver, repeat=5):
+    """Returns the best cleaning throughput over repeat runs.
+
+    Parameters:
+        clean (function): called as clean(entity, resolver).
+        entities (list): raw entities.
+        resolver (Resolver): resolver of the entities' links.
+        repeat (int): number of timed runs.
+
+    Returns:
+        float: records cleaned per second.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for entity in entities:
+            clean(entity, resolver)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(entities) / best
+
+
+def main():
+    """Prints records/sec before and after the compiled schemas.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    entities = synthetic_entities(50000)
+    resolver = synthetic_resolver()
+
+    before = records_per_second(legacy_clean_data, entities, resolver)
+    after = records_per_second(swapi.clean_data, entities, resolver)
+    print(f"dispatch clean_data: {before:12,.0f} records/sec")
+    print(f"compiled schemas:    {after:12,.0f} records/sec ({after / before:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
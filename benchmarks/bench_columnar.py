@@ -0,0 +1,99 @@
+"""Benchmark: size of a crawled snapshot as JSON versus as a columnar snapshot,
+and time to answer two reporting queries (uninhabited planets, starships by
+passenger capacity) by parsing and cleaning the JSON versus through the
+memory-mapped columns.
+
+Run from the repository root:
+    python benchmarks/bench_columnar.py [snapshot] [copies]
+"""
+import json, os, sys, tempfile, time
+
+from bench_clean import ROOT, swapi
+from swapi_echo.clean import _PRESENT
+
+
+def scaled_snapshot(snapshot_path, copies):
+    """Returns the snapshot with every collection repeated copies times, each
+    copy under distinct urls.
+    """
+    snapshot = swapi.read_json(snapshot_path)
+    collections = {}
+    for kind, entities in snapshot['collections'].items():
+        collections[kind] = [dict(entity, url=f"{entity['url']}{copy}/")
+                             for copy in range(copies) for entity in entities]
+    return dict(snapshot, collections=collections)
+
+
+def json_queries(snapshot_path):
+    """Answers both queries from the JSON snapshot."""
+    collections = swapi.read_json(snapshot_path)['collections']
+    resolver = swapi.Resolver(policy={key: 'url' for key in swapi.REFERENCE_KEYS})
+    uninhabited = [planet['name'] for planet in swapi.clean_batch(
+        collections['planets'], swapi.COLLECTION_KEYS['planets'], 'population', resolver)]
+    starships = swapi.clean_batch(collections['starships'], swapi.COLLECTION_KEYS['starships'],
+                                  resolver=resolver)
+    transports = sorted(((ship['passengers'], ship['name']) for ship in starships
+                         if type(ship.get('passengers')) == int), reverse=True)
+    return uninhabited, transports
+
+
+def columnar_queries(columnar_path):
+    """Answers both queries from the columnar snapshot."""
+    with swapi.ColumnarSnapshot(columnar_path) as snapshot:
+        planets = snapshot['planets']
+        names = planets.column('name')
+        uninhabited = [names[row] for row in planets.column('population').nulls()]
+        starships = snapshot['starships']
+        passengers, names = starships.column('passengers'), starships.column('name')
+        transports = sorted(((passengers.data[row], names[row])
+                             for row in passengers.rows(_PRESENT)), reverse=True)
+    return uninhabited, transports
+
+
+def best_time(func, repeat=5):
+    """Returns func's result and its best wall time over repeat runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    """Prints file sizes and query times for both formats.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    snapshot_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, swapi.FIXTURES_PATH)
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, 'snapshot.json')
+        target = os.path.join(workdir, 'snapshot.swcol')
+        with open(source, 'w') as file:
+            json.dump(scaled_snapshot(snapshot_path, copies), file)
+        start = time.perf_counter()
+        rows = swapi.export_columnar(source, target)
+        export_seconds = time.perf_counter() - start
+
+        before, json_seconds = best_time(lambda: json_queries(source))
+        after, columnar_seconds = best_time(lambda: columnar_queries(target))
+        assert before == after, "both formats must answer the same"
+        json_size, columnar_size = os.path.getsize(source), os.path.getsize(target)
+
+    print(f"{sum(rows.values()):,} entities ({copies} copies of {os.path.basename(snapshot_path)}), "
+          f"exported in {export_seconds:.2f}s")
+    print(f"JSON snapshot:     {json_size:12,} bytes")
+    print(f"columnar snapshot: {columnar_size:12,} bytes ({columnar_size / json_size:.0%})")
+    print(f"queries from JSON:     {json_seconds * 1000:9.1f} ms")
+    print(f"queries from columns:  {columnar_seconds * 1000:9.1f} ms "
+          f"({json_seconds / columnar_seconds:.0f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
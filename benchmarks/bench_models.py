@@ -0,0 +1,66 @@
+"""Benchmark: memory held per cleaned record as slotted models versus plain
+dicts, and write_json() speed versus json.dump().
+
+Run from the repository root:
+    python benchmarks/bench_models.py [records]
+"""
+import io, json, sys, time, tracemalloc
+
+from bench_clean import swapi, synthetic_entities, synthetic_resolver
+
+
+def bytes_per_record(build, entities):
+    """Returns the memory retained by build(entities), per entity.
+
+    Parameters:
+        build (function): returns the cleaned entities.
+        entities (list): raw entities.
+
+    Returns:
+        float: bytes per record.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    cleaned = build(entities)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del cleaned
+    return retained / len(entities)
+
+
+def main():
+    """Prints bytes per record and serialization time.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    entities = synthetic_entities(count)
+    resolver = synthetic_resolver()
+    clean_data = swapi.clean_data
+
+    as_dicts = bytes_per_record(
+        lambda batch: [clean_data(entity, resolver).to_dict() for entity in batch], entities)
+    as_records = bytes_per_record(
+        lambda batch: [clean_data(entity, resolver) for entity in batch], entities)
+    print(f"dict records:    {as_dicts:8.0f} bytes/record")
+    print(f"slotted records: {as_records:8.0f} bytes/record ({as_records / as_dicts:.0%})")
+
+    cleaned = [clean_data(entity, resolver) for entity in entities]
+    encoder = json.JSONEncoder(default=swapi.to_json)  # the encoder write_json() uses
+    dicts = json.loads(encoder.encode(cleaned))  # plain dicts all the way down
+    start = time.perf_counter()
+    json.dump(dicts, io.StringIO())
+    before = time.perf_counter() - start
+    start = time.perf_counter()
+    encoder.encode(cleaned)
+    after = time.perf_counter() - start
+    print(f"json.dump(dicts):       {before:.3f}s")
+    print(f"encoder.encode(models): {after:.3f}s ({before / after:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
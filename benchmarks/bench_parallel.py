@@ -0,0 +1,40 @@
+"""Benchmark: records cleaned per second by clean_parallel() for 1..N worker
+processes on a snapshot-sized batch of synthetic people, planets, starships,
+species and vehicles.
+
+Run from the repository root:
+    python benchmarks/bench_parallel.py [records]
+"""
+import os, sys, time
+
+from bench_clean import swapi, synthetic_entities
+
+
+def main():
+    """Prints records/sec and speedup per worker count.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    entities = synthetic_entities(count)
+    planets = [entity for entity in entities if 'surface_water' in entity]
+    cpus = os.cpu_count() or 1
+
+    for label, batch, keys in (('planets (columnar)', planets, swapi.PLANET_KEYS),
+                               ('mixed (per entity)', [e for e in entities if 'gender' not in e], None)):
+        baseline = None
+        for workers in sorted({1, 2, cpus} if cpus > 1 else {1}):
+            start = time.perf_counter()
+            swapi.clean_parallel(batch, keys, workers=workers)
+            rate = len(batch) / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"{label:20} workers={workers:<3} {rate:12,.0f} records/sec "
+                  f"({rate / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark: time per query over a Dataset the size of a full SWAPI crawl,
+scanning and through secondary indexes, next to the hand-written
+uninhabited-planets loop the planets output used before.
+
+Run from the repository root:
+    python benchmarks/bench_query.py [snapshot] [copies]
+"""
+import json, os, sys, tempfile, timeit
+
+from bench_clean import ROOT, swapi
+from bench_columnar import scaled_snapshot
+from swapi_echo.clean import clean_data, filter_data, is_unknown
+from swapi_echo.config import PLANET_KEYS
+
+INDEXES = (('planets', 'population'), ('people', 'homeworld'), ('people', 'species'))
+
+
+def legacy_uninhabited(planets):
+    """The filter-then-clean loop the uninhabited planets output used before."""
+    uninhabited = []
+    for planet in planets:
+        if is_unknown(planet['population']):
+            uninhabited.append(clean_data(filter_data(planet, PLANET_KEYS)))
+    return uninhabited
+
+
+def queries(dataset):
+    """Returns the benchmarked queries: name -> function running one."""
+    tatooine = dataset.query('planets').where('name', '==', 'Tatooine').first()['url']
+    return {
+        'uninhabited planets': lambda: dataset.query('planets').where(
+            'population', 'is', None).select(PLANET_KEYS).all(),
+        'people of Tatooine': lambda: dataset.query('people').where(
+            'homeworld', '==', tatooine).select(('name',)).all(),
+        'humans with homeworld': lambda: dataset.query('people').where(
+            'species', 'contains', 'https://swapi.co/api/species/1/').join(
+            'homeworld', ('name', 'climate')).select(('name', 'homeworld')).all(),
+        'transport capacity': lambda: dataset.query('starships').where(
+            'passengers', '>', 0).sum(lambda ship: ship['passengers']),
+        'people per gender': lambda: {gender: group.count() for gender, group in
+                                      dataset.query('people').group_by('gender').items()},
+    }
+
+
+def microseconds(func, number=200):
+    """Returns the best time per call of func, in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    """Prints microseconds per query, scanning and indexed.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    snapshot_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, swapi.FIXTURES_PATH)
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, 'snapshot.json')
+        with open(source, 'w') as file:
+            json.dump(scaled_snapshot(snapshot_path, copies), file)
+        raw_planets = swapi.read_json(source)['collections']['planets']
+        scanned = swapi.Dataset.from_file(source)
+        indexed = swapi.Dataset.from_file(source, INDEXES)
+
+    print(f"{sum(map(len, scanned.collections.values())):,} entities "
+          f"({copies} copies of {os.path.basename(snapshot_path)})")
+    print(f"{'hand-written uninhabited loop':30} {microseconds(lambda: legacy_uninhabited(raw_planets)):9.1f} us")
+    scans, lookups = queries(scanned), queries(indexed)
+    for name in scans:
+        assert scans[name]() == lookups[name](), name
+        print(f"{name:30} {microseconds(scans[name]):9.1f} us scanned "
+              f"{microseconds(lookups[name]):9.1f} us indexed")
+
+
+if __name__ == '__main__':
+    main()
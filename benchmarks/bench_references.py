@@ -0,0 +1,56 @@
+"""Benchmark: fetches issued while cleaning the people of a snapshot when
+homeworld and species are expanded eagerly versus through lazy References,
+for a consumer that only reads names and for one that serializes everything.
+
+Run from the repository root:
+    python benchmarks/bench_references.py [snapshot]
+"""
+import json, os, sys, time
+
+from bench_clean import ROOT, legacy_clean_data, swapi
+
+
+def counting_resolver(store):
+    """Returns a resolver fetching from store and the list its fetches are logged to."""
+    fetched = []
+
+    def fetch(url, params=None):
+        fetched.append(url)
+        return store.get(url, params)
+    return swapi.Resolver(fetch), fetched
+
+
+def main():
+    """Prints fetches and time per strategy.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    snapshot_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, swapi.FIXTURES_PATH)
+    store = swapi.load_snapshot(snapshot_path)
+    people = [swapi.filter_data(person, swapi.PEOPLE_KEYS) for person in store.collections['people']]
+    clean_data = swapi.clean_data
+    encoder = json.JSONEncoder(default=swapi.to_json)  # the encoder write_json() uses
+
+    cases = (
+        ('eager, names only', lambda entity, resolver: legacy_clean_data(entity, resolver)['name']),
+        ('lazy, names only', lambda entity, resolver: clean_data(entity, resolver)['name']),
+        ('eager, serialized', lambda entity, resolver: encoder.encode(legacy_clean_data(entity, resolver))),
+        ('lazy, serialized', lambda entity, resolver: encoder.encode(clean_data(entity, resolver))),
+    )
+    print(f"{len(people)} people from {os.path.basename(snapshot_path)}")
+    for label, consume in cases:
+        resolver, fetched = counting_resolver(store)
+        start = time.perf_counter()
+        for person in people:
+            consume(person, resolver)
+        elapsed = time.perf_counter() - start
+        print(f"{label:18} {len(fetched):5} fetches  {elapsed * 1000:8.2f} ms  "
+              f"deferred links: {resolver.stats()['deferred']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark: cold-start wall time of short swapi-echo invocations, each in a
+fresh interpreter, next to a bare interpreter and to importing the heavy
+dependencies (asyncio, requests) that the command line defers.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [runs]
+"""
+import os, subprocess, sys, tempfile, time
+
+from bench_clean import ROOT, swapi
+
+
+def commands(cache_path):
+    """Returns the timed invocations: name -> interpreter arguments."""
+    return {
+        'python -c pass': ['-c', 'pass'],
+        'swapi-echo --version': ['-m', 'swapi_echo', '--version'],
+        'swapi-echo --help': ['-m', 'swapi_echo', '--help'],
+        'swapi-echo cache stats': ['-m', 'swapi_echo', 'cache', 'stats', '--path', cache_path],
+        'import swapi_echo.build': ['-c', 'import swapi_echo.build'],
+        'import build, asyncio, requests': ['-c', 'import swapi_echo.build, asyncio, requests'],
+    }
+
+
+def best_wall(arguments, runs):
+    """Returns the best wall time, in milliseconds, of running the interpreter
+    with arguments from the repository root.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, cwd=ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """Prints the best wall time of each invocation.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_path = os.path.join(workdir, 'cache.sqlite3')
+        swapi.ResponseCache(cache_path).close()  # an empty cache for cache stats to read
+        baseline = None
+        for name, arguments in commands(cache_path).items():
+            wall = best_wall(arguments, runs)
+            baseline = wall if baseline is None else baseline
+            print(f"{name:32} {wall:7.1f} ms (+{wall - baseline:5.1f} ms over the interpreter)")
+
+
+if __name__ == '__main__':
+    main()
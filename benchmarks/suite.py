@@ -0,0 +1,241 @@
+"""Benchmark suite: micro-benchmarks of the cleaning helpers, throughput of the
+planets pass over scaled-up copies of swapi_planets-v1p0.json and the
+end-to-end main() build against a local StubServer with injected latency.
+Results are written as JSON so runs on different commits can be compared.
+
+Run from the repository root:
+    python benchmarks/suite.py [--quick] [--output FILE] [--compare FILE]
+"""
+import argparse, contextlib, datetime, json, os, platform, shutil, subprocess, tempfile, time, timeit
+
+from bench_clean import ROOT, swapi, synthetic_entities, synthetic_resolver
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+PLANET_SCALES = (1, 100, 1000)  # copies of swapi_planets-v1p0.json
+STUB_LATENCY = 0.05  # seconds added to every stub response
+BATCH_DOCUMENTS = 20  # copies of swapi_echo_base-v1p0.json built by the batch case
+KINDS = ('people', 'planets', 'starships', 'species', 'vehicles')  # synthetic_entities() order
+
+
+def best_rate(func, items, repeat=5):
+    """Returns the best throughput of func over repeat runs.
+
+    Parameters:
+        func (function): called once with items per run.
+        items (int): items processed per call, for the rate.
+        repeat (int): number of timed runs.
+
+    Returns:
+        float: items per second.
+    """
+    return items / min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def micro_benchmarks(count, repeat):
+    """Times clean_data per entity type and the helpers it is built from.
+
+    Parameters:
+        count (int): synthetic entities per type.
+        repeat (int): timed runs per case.
+
+    Returns:
+        dict: case name -> {'ops_per_sec': float}.
+    """
+    entities = synthetic_entities(count * len(KINDS))
+    resolver = synthetic_resolver()
+    clean_data, filter_data, is_unknown = swapi.clean_data, swapi.filter_data, swapi.is_unknown
+    convert_string_to_int = swapi.convert_string_to_int
+    convert_string_to_float = swapi.convert_string_to_float
+    convert_string_to_list = swapi.convert_string_to_list
+
+    results = {}
+    for offset, kind in enumerate(KINDS):
+        batch = entities[offset::len(KINDS)]
+        results[f'clean_data/{kind}'] = best_rate(
+            lambda: [clean_data(entity, resolver) for entity in batch], len(batch), repeat)
+
+    people, keys = entities[0::len(KINDS)], swapi.PEOPLE_KEYS
+    values = [value for entity in entities for value in entity.values() if isinstance(value, str)]
+    numbers = [str(number) for number in range(len(values))]
+    floats = [f"{number}.5" for number in range(len(values))]
+    lists = ['arid, temperate, tropical'] * len(values)
+    results['filter_data/people'] = best_rate(
+        lambda: [filter_data(entity, keys) for entity in people], len(people), repeat)
+    results['is_unknown'] = best_rate(
+        lambda: [is_unknown(value) for value in values], len(values), repeat)
+    results['convert_string_to_int'] = best_rate(
+        lambda: [convert_string_to_int(value) for value in numbers], len(numbers), repeat)
+    results['convert_string_to_float'] = best_rate(
+        lambda: [convert_string_to_float(value) for value in floats], len(floats), repeat)
+    results['convert_string_to_list'] = best_rate(
+        lambda: [convert_string_to_list(value) for value in lists], len(lists), repeat)
+    return {name: {'ops_per_sec': rate} for name, rate in results.items()}
+
+
+def planets_benchmarks(workdir, scales, repeat):
+    """Times the planets pass of main() (write_uninhabited_planets()) over
+    scaled-up copies of the planets file.
+
+    Parameters:
+        workdir (str): scratch directory for the scaled inputs and outputs.
+        scales (tuple): number of copies of the planets file per case.
+        repeat (int): timed runs per case.
+
+    Returns:
+        dict: case name -> {'records', 'records_per_sec', 'seconds'}.
+    """
+    planets = swapi.read_json(os.path.join(ROOT, swapi.INPUTPLANET))
+    results = {}
+    for scale in scales:
+        source = os.path.join(workdir, f'planets-x{scale}.json')
+        target = os.path.join(workdir, f'uninhabited-x{scale}.json')
+        with open(source, 'w') as file:
+            json.dump(planets * scale, file)
+
+        seconds = min(timeit.repeat(lambda: swapi.write_uninhabited_planets(source, target),
+                                    number=1, repeat=repeat))
+        records = len(planets) * scale
+        results[f'planets_pass/x{scale}'] = {'records': records, 'seconds': seconds,
+                                             'records_per_sec': records / seconds}
+    return results
+
+
+@contextlib.contextmanager
+def build_directory(workdir, environ):
+    """Runs the body in a copy of the repository inputs with the given
+    environment variables set and the shared cache and client reset.
+    """
+    for name in (swapi.INPUTPLANET, swapi.INPUTECHO):
+        shutil.copy(os.path.join(ROOT, name), workdir)
+    previous_dir, previous_env = os.getcwd(), dict(os.environ)
+    os.chdir(workdir)
+    os.environ.update(environ)
+    swapi.close_client()
+    swapi.close_response_cache()
+    try:
+        yield
+    finally:
+        swapi.close_client()
+        swapi.close_response_cache()
+        os.chdir(previous_dir)
+        os.environ.clear()
+        os.environ.update(previous_env)
+
+
+def end_to_end_benchmarks(workdir, latency):
+    """Times full main() builds against a StubServer: a cold build (empty
+    response cache), a warm full rebuild (cache primed) and an incremental
+    rebuild with nothing changed; then a cold batch build of BATCH_DOCUMENTS
+    base documents, whose requests should match a single build's.
+
+    Parameters:
+        workdir (str): scratch directory the builds run in.
+        latency (float): seconds the stub adds to every response.
+
+    Returns:
+        dict: case name -> {'seconds', 'requests'}.
+    """
+    results = {}
+    with swapi.StubServer(latency=latency) as stub, \
+            build_directory(workdir, {'SWAPI_ENDPOINT_ALIAS': stub.url,
+                                      'SWAPI_CACHE_PATH': os.path.join(workdir, 'cache.sqlite3')}):
+        for case, full_rebuild in (('cold', True), ('warm_cache', True), ('incremental', False)):
+            before = stub.stats()['requests']
+            start = time.perf_counter()
+            swapi.main(full_rebuild=full_rebuild)
+            seconds = time.perf_counter() - start
+            results[f'main/{case}'] = {'seconds': seconds,
+                                       'requests': stub.stats()['requests'] - before}
+
+        os.makedirs('bases')
+        for number in range(BATCH_DOCUMENTS):
+            shutil.copy(swapi.INPUTECHO, os.path.join('bases', f'base{number}-v1p0.json'))
+        swapi.close_response_cache()
+        os.environ['SWAPI_CACHE_PATH'] = os.path.join(workdir, 'batch-cache.sqlite3')  # cold cache
+        before = stub.stats()['requests']
+        start = time.perf_counter()
+        swapi.build_batch('bases', 'outputs')
+        seconds = time.perf_counter() - start
+        results[f'batch/x{BATCH_DOCUMENTS}'] = {'seconds': seconds,
+                                                'requests': stub.stats()['requests'] - before}
+    return results
+
+
+def git_commit():
+    """Returns the checked-out commit hash (with a '+dirty' suffix for local
+    changes), or None outside a git checkout.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('+dirty' if dirty else '')
+
+
+def compare(results, baseline):
+    """Prints every case's change against a previous results file.
+
+    Parameters:
+        results (dict): this run's results.
+        baseline (dict): results loaded from an earlier run.
+
+    Returns:
+        None
+    """
+    print(f"\nchange vs {baseline.get('commit')}:")
+    for name, current in results['cases'].items():
+        previous = baseline['cases'].get(name)
+        if previous is None:
+            continue
+        metric = next(key for key in ('ops_per_sec', 'records_per_sec', 'seconds') if key in current)
+        ratio = current[metric] / previous[metric]
+        if metric == 'seconds':
+            ratio = 1 / ratio  # faster is better everywhere
+        print(f"  {name:32} {ratio:6.2f}x {'faster' if ratio >= 1 else 'slower'}")
+
+
+def main():
+    """Runs the suite, prints a summary and saves the results.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--quick', action='store_true', help='smaller inputs and fewer repeats')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--latency', type=float, default=STUB_LATENCY,
+                        help='seconds the stub server adds to every response')
+    args = parser.parse_args()
+    repeat = 2 if args.quick else 5
+
+    results = {'commit': git_commit(),
+               'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+               'python': platform.python_version(), 'platform': platform.platform(),
+               'cases': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        results['cases'].update(micro_benchmarks(2000 if args.quick else 20000, repeat))
+        results['cases'].update(planets_benchmarks(workdir, PLANET_SCALES[:2] if args.quick
+                                                   else PLANET_SCALES, repeat))
+        results['cases'].update(end_to_end_benchmarks(workdir, args.latency))
+
+    for name, case in results['cases'].items():
+        print(f"{name:34} " + '  '.join(f"{key}={value:,.4g}" for key, value in case.items()))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"\nresults saved to {output}")
+    if args.compare:
+        compare(results, swapi.read_json(args.compare))
+
+
+if __name__ == '__main__':
+    main()
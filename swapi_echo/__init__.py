@@ -0,0 +1,45 @@
+"""SWAPI Echo Base: builds the uninhabited planets and Echo Base documents from
+local files and the Star Wars API. The library is split into modules by
+concern:
+
+    config    settings, file names and the keys kept per entity type
+    metrics   optional timings, counters and latency histograms
+    models    slotted entity records, overlays and lazy references
+    jsonio    reading, streaming and writing JSON; digests
+    cache     SQLite response cache
+    client    SwapiClient, record/replay clients, get_swapi_resource()
+    snapshot  EntityStore answering requests from a crawled snapshot
+    clean     conversions, schemas, Resolver and clean_data()/clean_batch()
+    columnar  memory-mapped columnar snapshots
+    dataset   Dataset, Query and query()
+    engine    AsyncEngine
+    pipeline  incremental build pipeline and build state
+    crawler   crawl(), crawling SWAPI into a snapshot
+    stub      StubServer, a local SWAPI stand-in
+    build     main(), build_batch() and the Echo Base build
+
+and the swapi-echo command line lives in swapi_echo.cli. Public names of the
+modules can be reached from the package as well (swapi_echo.clean_data); a
+module is imported on first such access, so importing the package does no work,
+and the name is then bound on the package so later lookups are plain attribute
+reads. No module shares a name with one of those public names.
+"""
+__version__ = '1.1.0'
+
+_MODULES = ('config', 'metrics', 'models', 'jsonio', 'cache', 'client', 'snapshot', 'clean',
+            'columnar', 'dataset', 'engine', 'pipeline', 'crawler', 'stub', 'build')
+
+
+def __getattr__(name):
+    """Forwards a missing attribute to the first module defining the name and binds
+    it on the package (PEP 562).
+    """
+    if not name.startswith('_'):
+        import importlib
+        for module in _MODULES:
+            # not "from . import": that probes this hook
+            value = getattr(importlib.import_module(f'{__name__}.{module}'), name, _MODULES)
+            if value is not _MODULES:
+                globals()[name] = value
+                return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,6 @@
+"""Runs the swapi-echo command line: python -m swapi_echo [command]."""
+import sys
+
+from .cli import main
+
+sys.exit(main())
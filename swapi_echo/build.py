@@ -0,0 +1,372 @@
+"""Building the uninhabited planets and Echo Base documents, one at a time
+(main()) or many in one run (build_batch()).
+"""
+import contextlib, glob, json, logging, os
+
+from .config import (
+    BATCH_STATE_PATH, ECHO_BASE_ASSETS, ECHO_BASE_CREWS, ECHO_BASE_PEOPLE, ECHO_BASE_SEARCHES,
+    ENDPOINT, EVACUATION_ESCORTS, EVACUATION_PASSENGERS, EVACUATION_TRANSPORT, FIXTURES_PATH,
+    INPUTECHO, INPUTPLANET, OUTPUTECHO, OUTPUTPLANET, PEOPLE_KEYS, PIPELINE_STATE_PATH,
+    PLANET_KEYS, SNAPSHOT_PATH,
+)
+from .metrics import count, disable_metrics, enable_metrics, stage
+from .models import Overlay
+from .jsonio import digest, file_digest, iter_json, read_json, write_json, _encoder
+from .cache import close_response_cache
+from .client import close_client
+from .snapshot import load_snapshot
+from .clean import assign_crew, combine_data, iter_clean
+from .dataset import query
+from .engine import AsyncEngine
+from .pipeline import (
+    Pipeline, get_path, output_current, read_pipeline_state, record_output, schema_fingerprint,
+    set_path,
+)
+
+log = logging.getLogger(__name__)
+
+
+def evacuation_plan(plan, personnel, num_trans, transport, passengers, escorts):
+    """Computes the evacuation plan: base personnel, transport capacity and the
+    Bright Hope transport assignment with its passengers and crewed escorts.
+
+    Parameters:
+        plan (dict): default evacuation_plan section.
+        personnel (dict): garrison personnel counts.
+        num_trans (int): available transports.
+        transport (dict): cleaned transport assigned to the evacuation.
+        passengers (list): cleaned people aboard the transport.
+        escorts (list): crewed starfighters escorting the transport.
+
+    Returns:
+        dict: the completed evacuation plan.
+    """
+    evac_plan = plan.copy()
+    evac_plan['max_base_personnel'] = query(personnel.values()).sum()
+    transports = query([Overlay(transport, {'num_available': num_trans})])
+    evac_plan['max_available_transports'] = transports.sum('num_available')
+    multi = plan['passenger_overload_multiplier']
+    evac_plan['passenger_overload_multiplier'] = multi
+    evac_plan['max_passenger_overload_capacity'] = multi * transports.sum(
+        lambda ship: ship['passengers'] * ship['num_available'])
+
+    evac_transport = Overlay(transport, {'name': EVACUATION_TRANSPORT[1],
+                                         'passenger_manifest': list(passengers),
+                                         'escorts': list(escorts)})
+    evac_plan['transport_assignments'] = plan['transport_assignments'] + [evac_transport]
+    return evac_plan
+
+
+def echo_base_pipeline(echo_base, engine, endpoint=ENDPOINT, state=None):
+    """Declares the Echo Base build as a pipeline from the ECHO_BASE_* and
+    EVACUATION_* configuration. Document sections become source nodes of their
+    own, so an edit to one section only re-runs the nodes that read it; nodes
+    that expand references re-run when a referenced resource's digest changes.
+
+    Parameters:
+        echo_base (dict): default Echo Base document.
+        engine (AsyncEngine): fetch engine.
+        endpoint (str): SWAPI root url.
+        state (dict): pipeline state from the previous run.
+
+    Returns:
+        Pipeline: pipeline whose 'echo_base' node is the enriched document and
+            whose 'evacuation_plan' node is the evacuation plan alone.
+    """
+    async def revalidate(url):
+        return digest(await engine.get(url))
+
+    pipeline = Pipeline(state, schema_fingerprint(), revalidate)
+
+    def section(path):
+        name = 'document/' + '/'.join(str(step) for step in path)
+        if name not in pipeline.nodes:
+            pipeline.add(name, lambda: get_path(echo_base, path))
+        return name
+
+    for name, (collection, term) in ECHO_BASE_SEARCHES.items():
+        pipeline.add(name, lambda url=f"{endpoint}/{collection}/", term=term:
+                     engine.search(url, term))
+    for name, term in ECHO_BASE_PEOPLE.items():
+        pipeline.add(f"swapi_{name}", lambda term=term: engine.search(f"{endpoint}/people/", term))
+        pipeline.add(name, lambda person: engine.clean(person, PEOPLE_KEYS), (f"swapi_{name}",))
+
+    placements = {}
+    for name, (path, lookup, keys) in ECHO_BASE_ASSETS.items():
+        if lookup is None:
+            pipeline.add(name, lambda default, keys=keys: engine.clean(default, keys),
+                         (section(path),))
+        else:
+            pipeline.add(name, lambda default, swapi, keys=keys:
+                         engine.clean(combine_data(default, swapi), keys),
+                         (section(path), lookup))
+        placements[path] = name
+    for name, (starship, roles) in ECHO_BASE_CREWS.items():
+        pipeline.add(name, lambda ship, *crew, roles=tuple(roles):
+                     assign_crew(ship, dict(zip(roles, crew))),
+                     (starship,) + tuple(roles.values()))
+        placements[ECHO_BASE_ASSETS[starship][0]] = name
+
+    escort_inputs = []
+    for number, (starship, roles) in enumerate(EVACUATION_ESCORTS):
+        name = f"escort_{number}"
+        pipeline.add(name, lambda ship, *crew, roles=tuple(roles):
+                     assign_crew(ship, dict(zip(roles, crew))),
+                     (starship,) + tuple(roles.values()))
+        escort_inputs.append(name)
+    transports = ECHO_BASE_ASSETS[EVACUATION_TRANSPORT[0]][0][:-1]  # transports[0] entry
+    pipeline.add('evacuation_plan', lambda plan, personnel, transport_entry, transport, *crew:
+                 evacuation_plan(plan, personnel, transport_entry['num_available'], transport,
+                                 crew[:len(EVACUATION_PASSENGERS)],
+                                 crew[len(EVACUATION_PASSENGERS):]),
+                 (section(('evacuation_plan',)), section(('garrison', 'personnel')),
+                  section(transports), EVACUATION_TRANSPORT[0])
+                 + EVACUATION_PASSENGERS + tuple(escort_inputs))
+    placements[('evacuation_plan',)] = 'evacuation_plan'
+
+    def assemble(document, *parts):
+        document = json.loads(_encoder.encode(document))  # deep copy
+        for path, part in zip(placements, parts):
+            set_path(document, path, part)
+        return document
+
+    pipeline.add('document', lambda: echo_base)
+    pipeline.add('echo_base', assemble, ('document',) + tuple(placements.values()))
+    return pipeline
+
+
+async def build_echo_base(echo_base, engine=None, endpoint=ENDPOINT, targets=('echo_base',),
+                          state=None):
+    """Enriches the Echo Base document with SWAPI data and computes the
+    evacuation plan by running echo_base_pipeline(). Every lookup is started up
+    front and each step waits only for its own inputs, so the build takes
+    roughly as long as its longest chain of dependent requests.
+
+    Parameters:
+        echo_base (dict): default Echo Base document.
+        engine (AsyncEngine): fetch engine; defaults to a new AsyncEngine.
+        endpoint (str): SWAPI root url.
+        targets (tuple): nodes to build; the first one is returned
+            (e.g., ('evacuation_plan',) builds just the evacuation plan).
+        state (dict): pipeline state from a previous run, updated in place;
+            nodes with unchanged inputs reuse their saved output.
+
+    Returns:
+        dict: output of the first target (by default the enriched document).
+    """
+    if engine is None:
+        engine = AsyncEngine()
+    pipeline = echo_base_pipeline(echo_base, engine, endpoint, state)
+    results = await pipeline.run(list(targets))
+    return results[targets[0]]
+
+
+def main(full_rebuild=False):
+    """"Entry point. This program will interact with local file assets and the     
+    API to create two data files required by Rebel Alliance Intelligence.
+    If the SWAPI_SNAPSHOT environment variable names a snapshot written by
+    crawl_swapi() every SWAPI lookup is answered from it without the network;
+    SWAPI_REPLAY and SWAPI_RECORD replay or record the run (see get_client()).
+    Builds are incremental: steps whose inputs are unchanged since the last run
+    (see PIPELINE_STATE_PATH) reuse their previous results and output files
+    whose content would not change are not rewritten.
+    If SWAPI_METRICS names a file the run is instrumented and its report is
+    written there (Prometheus text for *.prom, JSON otherwise); if SWAPI_PROFILE
+    names a file the main thread is profiled with cProfile into it.
+
+    Parameters:        
+        full_rebuild (bool): ignore the saved state and rebuild everything.
+
+    Returns:        
+        None 
+    """
+    with instrumented():
+        build_outputs(full_rebuild)
+
+
+@contextlib.contextmanager
+def instrumented():
+    """Instruments the body when SWAPI_METRICS names a report file and profiles
+    it with cProfile when SWAPI_PROFILE names a stats file (see main()).
+    """
+    import cProfile
+    metrics_path = os.environ.get('SWAPI_METRICS')
+    profile_path = os.environ.get('SWAPI_PROFILE')
+    if metrics_path:
+        enable_metrics()
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if metrics_path:
+            disable_metrics().write(metrics_path)
+
+
+def write_uninhabited_planets(source=INPUTPLANET, target=OUTPUTPLANET):
+    """Streams the planets whose population is unknown from source to target,
+    cleaned. The population test is pushed down into iter_clean(), so planets
+    that are inhabited are dropped before they are cleaned.
+
+    Parameters:
+        source (str): JSON list of raw planets.
+        target (str): file to write the cleaned uninhabited planets to.
+
+    Returns:
+        None
+    """
+    write_json(target, iter_clean(iter_json(source), PLANET_KEYS, unknown_key='population'))
+
+
+def build_outputs(full_rebuild=False):
+    """Writes the uninhabited planets and Echo Base files (see main()).
+
+    Parameters:
+        full_rebuild (bool): ignore the saved state and rebuild everything.
+
+    Returns:
+        None
+    """
+    import asyncio
+    state = read_pipeline_state(PIPELINE_STATE_PATH)
+    if full_rebuild:
+        state['nodes'].clear()
+        state['outputs'].clear()
+    outputs = state['outputs']
+    schemas = schema_fingerprint()
+
+    # uninhabited planets: population unknown, streamed from file to file
+    fingerprint = digest([file_digest(INPUTPLANET), schemas])
+    if not output_current(outputs, OUTPUTPLANET, fingerprint):
+        write_uninhabited_planets(INPUTPLANET, OUTPUTPLANET)
+        record_output(outputs, OUTPUTPLANET, fingerprint)
+    
+# swapi_echo_base-v1p1.json
+    try:
+        with stage('echo_base'):
+            asyncio.run(build_documents([(INPUTECHO, OUTPUTECHO, state['nodes'])], outputs))
+        write_json(PIPELINE_STATE_PATH, state)
+    finally:
+        close_client()
+        close_response_cache()
+
+
+async def build_documents(jobs, outputs, engine=None):
+    """Builds Echo-Base-style documents concurrently on one engine, so their
+    SWAPI lookups share one resolver, response cache and connection pool and
+    every distinct url or search is fetched once. Each document is written as
+    soon as it is built, unless its output file is already current. If the
+    SWAPI_SNAPSHOT environment variable names a crawled snapshot every lookup
+    is answered from it.
+
+    Parameters:
+        jobs (list): (input file, output file, pipeline node state) per document.
+        outputs (dict): 'outputs' section of the build state, updated in place.
+        engine (AsyncEngine): engine to share; defaults to a new one.
+
+    Returns:
+        list: per job, True if its output file was written.
+    """
+    import asyncio
+    if engine is None:
+        snapshot_path = os.environ.get('SWAPI_SNAPSHOT')
+        engine = AsyncEngine(source=load_snapshot(snapshot_path) if snapshot_path else None)
+
+    async def build(source, target, nodes):
+        echo_base = await build_echo_base(await asyncio.to_thread(read_json, source), engine,
+                                          state=nodes)
+        fingerprint = digest(echo_base)
+        if output_current(outputs, target, fingerprint):
+            return False
+        await asyncio.to_thread(write_json, target, echo_base)
+        record_output(outputs, target, fingerprint)
+        return True
+
+    written = await asyncio.gather(*(build(*job) for job in jobs))
+    log.info("resolver %s", engine.resolver.stats())
+    for name, value in engine.resolver.stats().items():
+        count(f'resolver_{name}', value)
+    return written
+
+
+def batch_output_path(source, output_dir=None):
+    """Returns the output file of a base document: its name with the INPUTECHO
+    version suffix replaced by OUTPUTECHO's (e.g., hoth-v1p0.json ->
+    hoth-v1p1.json), or with OUTPUTECHO's suffix added.
+
+    Parameters:
+        source (str): base document.
+        output_dir (str): directory to write to; defaults to the source's.
+
+    Returns:
+        str: output file path.
+    """
+    input_suffix, output_suffix = INPUTECHO[INPUTECHO.rindex('-'):], OUTPUTECHO[OUTPUTECHO.rindex('-'):]
+    directory, name = os.path.split(source)
+    if name.endswith(input_suffix):
+        name = name[:-len(input_suffix)] + output_suffix
+    else:
+        name = os.path.splitext(name)[0] + output_suffix
+    return os.path.join(output_dir if output_dir is not None else directory, name)
+
+
+def batch_inputs(pattern):
+    """Lists the base documents named by a glob pattern, leaving out batch
+    outputs, or those in a directory: its files named like INPUTECHO
+    (*-v1p0.json) other than the planets list and the SWAPI snapshots.
+
+    Parameters:
+        pattern (str): directory or glob pattern.
+
+    Returns:
+        list: document paths, sorted.
+    """
+    output_suffix = OUTPUTECHO[OUTPUTECHO.rindex('-'):]
+    if not os.path.isdir(pattern):
+        return sorted(path for path in glob.glob(pattern) if not path.endswith(output_suffix))
+    input_suffix = INPUTECHO[INPUTECHO.rindex('-'):]
+    others = {INPUTPLANET, SNAPSHOT_PATH, FIXTURES_PATH}
+    return sorted(path for path in glob.glob(os.path.join(pattern, '*' + input_suffix))
+                  if os.path.basename(path) not in others)
+
+
+def build_batch(pattern, output_dir=None, full_rebuild=False, state_path=BATCH_STATE_PATH):
+    """Builds every base document named by pattern in one run (see
+    build_documents()), so the cost grows with the number of distinct SWAPI
+    resources rather than the number of documents. Builds are incremental
+    per document, with their state kept in state_path.
+
+    Parameters:
+        pattern (str): directory or glob of base documents.
+        output_dir (str): directory outputs are written to; defaults to each
+            document's own (see batch_output_path()).
+        full_rebuild (bool): ignore the saved state and rebuild everything.
+        state_path (str): batch state file.
+
+    Returns:
+        dict: output file -> True if it was written.
+    """
+    import asyncio
+    sources = batch_inputs(pattern)
+    if not sources:
+        raise FileNotFoundError(f"no base documents match {pattern}")
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    state = read_pipeline_state(state_path)
+    if full_rebuild:
+        state['nodes'].clear()
+        state['outputs'].clear()
+    jobs = [(source, batch_output_path(source, output_dir),
+             state['nodes'].setdefault(os.path.abspath(source), {})) for source in sources]
+    try:
+        with stage('echo_base'):
+            written = asyncio.run(build_documents(jobs, state['outputs']))
+        write_json(state_path, state)
+    finally:
+        close_client()
+        close_response_cache()
+    return {target: wrote for (_, target, _), wrote in zip(jobs, written)}
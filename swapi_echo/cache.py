@@ -0,0 +1,292 @@
+"""Persistent SQLite cache of SWAPI responses and the url helpers its keys
+are built from.
+"""
+import json, os, sqlite3, threading, time
+from urllib.parse import urlencode, urlsplit
+
+from .config import CACHE_DEFAULT_TTL, CACHE_MAX_BYTES, CACHE_PATH, CACHE_TOUCH_INTERVAL, CACHE_TTLS
+
+
+def cache_key(url, params=None):
+    """Builds the cache key for a SWAPI request from its url and params. Param
+    names are sorted and string values are stripped and lower-cased (SWAPI search
+    is case-insensitive) so that equivalent lookups share one cache entry.
+
+    Parameters:
+        url (str): resource or collection url.
+        params (dict): optional query parameters (e.g., {'search': 'yoda'}).
+
+    Returns:
+        str: normalized cache key.
+    """
+    if not params:
+        return url
+    normalized = []
+    for name in sorted(params):
+        value = params[name]
+        if isinstance(value, str):
+            value = value.strip().lower()
+        normalized.append((name, value))
+    return f"{url}?{urlencode(normalized)}"
+
+
+def resource_type(url):
+    """Returns the SWAPI resource type (e.g., 'planets', 'people') named by the
+    first path segment after /api/ in the passed in url.
+
+    Parameters:
+        url (str): resource or collection url.
+
+    Returns:
+        str: resource type or None if the url is not SWAPI-shaped.
+    """
+    segments = resource_path(url).split('/')
+    return segments[0] if segments[0] else None
+
+
+def resource_path(url):
+    """Returns the part of a SWAPI url after /api/ (e.g., 'planets/4'), which
+    identifies a resource independently of the host serving it.
+
+    Parameters:
+        url (str): resource or collection url.
+
+    Returns:
+        str: slash-separated path without leading or trailing slashes.
+    """
+    segments = [segment for segment in urlsplit(url).path.split('/') if segment]
+    if 'api' in segments:
+        segments = segments[segments.index('api') + 1:]
+    return '/'.join(segments)
+
+
+class ResponseCache:
+    """Persistent SQLite-backed cache of decoded SWAPI responses. Entries expire
+    per resource type (see CACHE_TTLS), are revalidated with ETag/Last-Modified
+    once stale and are evicted least recently used first once the stored bodies
+    exceed max_bytes. Hits do not write to the database: their last-use times
+    are collected and saved with the next put(), refresh() or close().
+    """
+
+    def __init__(self, path=CACHE_PATH, ttls=None, default_ttl=CACHE_DEFAULT_TTL,
+                 max_bytes=CACHE_MAX_BYTES):
+        """Opens (creating if necessary) the cache database.
+
+        Parameters:
+            path (str): sqlite database file; ':memory:' for a throwaway cache.
+            ttls (dict): seconds to live keyed by resource type.
+            default_ttl (int): seconds to live for unlisted resource types.
+            max_bytes (int): size cap of the stored response bodies.
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.ttls = CACHE_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._touched = {}  # key -> last-use time not yet written
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, url TEXT NOT NULL, body TEXT NOT NULL,"
+            " size INTEGER NOT NULL, etag TEXT, last_modified TEXT,"
+            " fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    def ttl_for(self, url):
+        """Returns the time to live in seconds for the resource type of url.
+
+        Parameters:
+            url (str): resource or collection url.
+
+        Returns:
+            int: seconds an entry stays fresh.
+        """
+        return self.ttls.get(resource_type(url), self.default_ttl)
+
+    def get(self, key):
+        """Looks up a cache entry and marks it as recently used (in memory; see
+        the class docstring).
+
+        Parameters:
+            key (str): key built by cache_key().
+
+        Returns:
+            dict: entry with 'data', 'etag', 'last_modified' and 'fresh' keys,
+                or None if the key is not cached.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, body, etag, last_modified, fetched_at, accessed_at FROM responses"
+                " WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            url, body, etag, last_modified, fetched_at, accessed_at = row
+            now = time.time()
+            if now - accessed_at >= CACHE_TOUCH_INTERVAL:
+                self._touched[key] = now
+        fresh = now - fetched_at < self.ttl_for(url)
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return {'data': json.loads(body), 'etag': etag,
+                'last_modified': last_modified, 'fresh': fresh}
+
+    def put(self, key, url, data, etag=None, last_modified=None):
+        """Stores a decoded response and evicts least recently used entries if
+        the cache grows past its size cap.
+
+        Parameters:
+            key (str): key built by cache_key().
+            url (str): requested url (used to pick the TTL).
+            data (dict): decoded JSON response.
+            etag (str): ETag response header, if any.
+            last_modified (str): Last-Modified response header, if any.
+
+        Returns:
+            None
+        """
+        body = json.dumps(data)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, body, len(body), etag, last_modified, now, now))
+            self._touched.pop(key, None)
+            self._write_touches()
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, key):
+        """Marks an entry as freshly fetched after a 304 Not Modified reply.
+
+        Parameters:
+            key (str): key built by cache_key().
+
+        Returns:
+            None
+        """
+        now = time.time()
+        with self._lock:
+            self._touched.pop(key, None)
+            self._write_touches()
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key))
+            self._conn.commit()
+        self.revalidated += 1
+
+    def _write_touches(self):
+        """Writes the last-use times collected by get() in one statement; the
+        caller commits. Caller must hold the lock.
+        """
+        if self._touched:
+            self._conn.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                   [(now, key) for key, now in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self):
+        """Deletes least recently used entries until the stored bodies fit in
+        max_bytes. Caller must hold the lock.
+        """
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def clear(self):
+        """Removes every entry from the cache.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        """Summarizes the cache contents and this process's hit/miss counts.
+
+        Parameters:
+            None
+
+        Returns:
+            dict: entry count, stored bytes, size cap, hits, misses and revalidations.
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {'path': self.path, 'entries': entries, 'bytes': size,
+                'max_bytes': self.max_bytes, 'hits': self.hits,
+                'misses': self.misses, 'revalidated': self.revalidated}
+
+    def close(self):
+        """Saves pending last-use times and closes the database connection.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._touched:
+                self._write_touches()
+                self._conn.commit()
+            self._conn.close()
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    """Returns the process-wide response cache, opening it on first use at
+    CACHE_PATH (override with the SWAPI_CACHE_PATH environment variable).
+
+    Parameters:
+        None
+
+    Returns:
+        ResponseCache: shared cache instance.
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(os.environ.get('SWAPI_CACHE_PATH', CACHE_PATH))
+    return _response_cache
+
+
+def close_response_cache():
+    """Closes the process-wide response cache if it was opened, saving its
+    pending last-use times; the next get_response_cache() opens it again.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    global _response_cache
+    if _response_cache is not None:
+        _response_cache.close()
+        _response_cache = None
@@ -0,0 +1,808 @@
+"""Cleaning raw SWAPI entities: value conversions, compiled per-type schemas,
+the Resolver for linked entities, and column-wise, streamed and parallel
+cleaning of whole collections.
+"""
+import array, contextvars, itertools, math, os, re, sys, threading
+
+from .config import (
+    CONVERTER_CACHE_SIZE, EXPANSION_DEPTH, EXPANSION_POLICY, HOTH_KEYS,
+    PARALLEL_CHUNKS_PER_WORKER, PARALLEL_MIN_ENTITIES, PEOPLE_KEYS, PEOPLE_LINKS, PLANET_KEYS,
+    PLANET_LINKS, REFERENCE_KEYS, SPECIES_KEYS, SPECIES_LINKS, STARSHIP_KEYS, STARSHIP_LINKS,
+    STREAM_BATCH_SIZE, VEHICLE_KEYS, VEHICLE_LINKS, float_props, int_props, list_props,
+)
+from .metrics import active_metrics, stage
+from .models import (
+    Overlay, Person, Planet, Reference, Species, Starship, Vehicle, entity_model,
+    iter_references, share_references,
+)
+from .jsonio import digest
+from .client import get_swapi_resource
+from .snapshot import load_snapshot
+
+
+def combine_data(default_data, override_data):
+    """ This function creates a shallow copy of the default dictionary and 
+        then updates the copy with key-value pairs from the 'override' dictionary. 
+    Parameters:
+        default_data (dict) 
+        override_data (dict)
+    Returns:
+        combine_dict: a dictionary that combines the key-value pairs of both 
+            the default dictionary and the override dictionary, 
+            with override values replacing default values on matching keys.
+    """
+    #default_data.update(override_data)
+    #return default_data
+    combined_data = dict(default_data)  # shallow; default_data may be a Record
+    combined_data.update(override_data)  # in place
+
+    return combined_data
+
+def filter_data(data, filter_keys):
+    """ This function applies a key name filter to a dictionary 
+        in order to return an ordered subset of key-values. 
+    Parameters:
+        data (dict) 
+        filter_keys (tuple)
+    Returns:
+        filter_dict: a filtered collection of key-value pairs to the caller. 
+    """
+    """
+    filter_dict={}
+    for key in filter_keys:
+        if key in data.keys():
+            filter_dict[key] = data[key]
+        #else:
+         #   filter_dict[key] = None
+        
+    return filter_dict
+    """
+    return {key: data[key] for key in filter_keys if key in data.keys()}
+
+
+def is_unknown(value):
+    """ This function applies a case-insensitive truth value 
+        test for string values that equal unknown or n/a .
+    Parameters:
+        value (str)
+    Returns:
+        True if a match is obtained
+    """
+    if not value:
+        return False
+    first = value[0]
+    if first not in 'uUnN' and not first.isspace():
+        return False  # most values are rejected without lower-casing them
+    return value.strip().lower() in _UNKNOWN_VALUES
+
+_UNKNOWN_VALUES = frozenset(('unknown', 'n/a'))
+
+# a number as SWAPI writes it: optional thousands separators and decimals,
+# optionally followed by a unit word (e.g., '1,000,000', '0.9 standard', '1000km')
+_NUMBER = re.compile(r'\s*([+-]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)(?:\s*[A-Za-z]+)?\s*\Z')
+
+
+def parse_number(value):
+    """Returns the numeric part of a SWAPI measurement with its thousands
+    separators removed, or None when the value is not a single number (e.g.,
+    ranges such as '30-165' or lists such as '1.5 (surface), 1 standard').
+
+    Parameters:
+        value (str): measurement (e.g., '1,000,000', '1 standard').
+
+    Returns:
+        str: the number (e.g., '1000000', '1'), or None.
+    """
+    match = _NUMBER.match(value)
+    if match is None:
+        return None
+    return match.group(1).replace(',', '')
+
+
+def convert_string_to_float(value):
+    """This function attempts to convert a string to a floating point value. 
+        Thousands separators and a trailing unit are accepted
+        (e.g., '1 standard' -> 1.0, '1,000.5' -> 1000.5).
+    Parameters:
+        value (str)
+    Returns:
+        value: If unsuccessful the function returns the value unchanged. 
+    """
+    try:     
+        return float(value)  # fast path: a plain number
+    except ValueError:     
+        number = parse_number(value)
+        return value if number is None else float(number)
+
+
+def convert_string_to_int(value):
+    """ This function attempts to convert a string to an int. 
+        Thousands separators and a trailing unit are accepted
+        (e.g., '1,000,000' -> 1000000, '1000km' -> 1000); values with a
+        fractional part or ranges (e.g., '30-165') are not ints.
+    Parameters:
+        value (str)
+    Returns:
+        value: If unsuccessful the function returns the value unchanged. 
+    """
+    try:     
+        return int(value)  # fast path: a plain integer
+    except ValueError:     
+        number = parse_number(value)
+        return value if number is None or '.' in number else int(number)
+
+
+def convert_string_to_list(value, delimiter=','):
+    """ This function converts a string of delimited text values to a list. 
+        The function will split the passed in string using the provided delimiter 
+        and return the resulting list to the caller. 
+    Parameters:
+        value (str) 
+        delimiter (str)
+    Returns:
+        str2list: return the resulting list to the caller. 
+    """
+    return [val.strip(' ') for val in value.split(delimiter)]
+
+
+_DROP = object()  # converter result meaning "leave the key out"
+
+
+def _passthrough(value):
+    return sys.intern(value)  # repeated values (e.g., manufacturers) are held once
+
+
+def _interned_list(value):
+    return [sys.intern(item) for item in convert_string_to_list(value)]
+
+
+def _strip_gravity(value):
+    return convert_string_to_float(value.rstrip())
+
+
+def _string_converter(convert, cached=True):
+    """Returns a converter applying convert to string values that are not
+    unknown/n/a; unknown strings become None and other types pass through.
+    Unless cached is False the result for each distinct string is remembered
+    (up to CONVERTER_CACHE_SIZE values) so repeated values are parsed once;
+    list results are copied on the way out so records never share a list.
+    """
+    if not cached:
+        def converter(value, resolver):
+            if type(value) != str:
+                return value
+            if is_unknown(value):
+                return None
+            return convert(value)
+        return converter
+
+    memo = {}
+
+    def converter(value, resolver):
+        if type(value) != str:
+            return value
+        try:
+            result = memo[value]
+        except KeyError:
+            result = None if is_unknown(value) else convert(value)
+            if len(memo) >= CONVERTER_CACHE_SIZE:
+                memo.clear()
+            memo[value] = result
+        return result.copy() if type(result) == list else result
+    return converter
+
+
+def _reference_converter(key):
+    """Returns the converter of a link field: per the resolver's policy its urls
+    become lazy References, stay urls or the key is dropped. homeworld holds a
+    single url; the other link fields hold lists of urls.
+    """
+    keys = REFERENCE_KEYS[key]
+    many = key != 'homeworld'
+
+    def converter(value, resolver):
+        policy = resolver.policy.get(key, 'skip')
+        if policy == 'skip':
+            return _DROP
+        if type(value) == str:
+            if is_unknown(value):
+                return None
+            if many:
+                return _DROP
+            return value if policy == 'url' else resolver.reference(value, keys)
+        if policy == 'url' or type(value) != list:
+            return value
+        return [resolver.reference(url, keys) if type(url) == str else url for url in value]
+    return converter
+
+
+def compile_converter(key):
+    """Picks the converter clean_data applies to a key, following the int_props,
+    float_props and list_props tuples and REFERENCE_KEYS. Converters are called
+    as converter(value, resolver).
+
+    Parameters:
+        key (str): entity key.
+
+    Returns:
+        function: converter for the key's values.
+    """
+    if key in REFERENCE_KEYS:
+        return _reference_converter(key)
+    if key in int_props:
+        return _string_converter(convert_string_to_int)
+    if key in float_props:
+        return _string_converter(_strip_gravity if key == 'gravity' else convert_string_to_float)
+    if key in list_props:
+        return _string_converter(_interned_list)
+    return _string_converter(_passthrough, cached=key not in ('url', 'name'))
+
+
+class Schema:
+    """Compiled cleaning schema for one entity type: the entity's filter keys
+    paired, in order, with the converter for each key, and the model class
+    cleaned entities are built as.
+    """
+
+    def __init__(self, name, marker, keys, model=None):
+        """Compiles a schema.
+
+        Parameters:
+            name (str): entity type name (e.g., 'person').
+            marker (str): key whose presence identifies the type (e.g., 'gender').
+            keys (tuple): filter keys, in output order (e.g., PEOPLE_KEYS).
+            model (type): Record subclass with a field per key; defaults to a
+                model generated from keys.
+
+        Returns:
+            None
+        """
+        self.name = name
+        self.marker = marker
+        self.keys = keys
+        self.model = model if model is not None else entity_model(name.title(), keys)
+        self.fields = [(key, compile_converter(key)) for key in keys]
+
+    def clean(self, entity, resolver):
+        """Filters and cleans an entity in a single pass over the schema.
+
+        Parameters:
+            entity (dict): raw or partially cleaned entity.
+            resolver (Resolver): expands homeworld and species references.
+
+        Returns:
+            Record: cleaned entity, an instance of the schema's model.
+        """
+        record = object.__new__(self.model)  # skips Record.__init__
+        for key, converter in self.fields:
+            if key in entity:
+                value = converter(entity[key], resolver)
+                if value is not _DROP:
+                    setattr(record, key, value)
+        return record
+
+
+SCHEMAS = []  # checked in order; the first schema whose marker is present wins
+_converters = {}
+
+
+def register_schema(name, marker, keys, model=None):
+    """Declares the cleaning schema of an entity type. clean_data uses it for
+    entities carrying marker that no earlier schema claimed.
+
+    Parameters:
+        name (str): entity type name.
+        marker (str): key identifying the type.
+        keys (tuple): filter keys, in output order.
+        model (type): model class of cleaned entities (see Schema).
+
+    Returns:
+        Schema: the compiled schema.
+    """
+    schema = Schema(name, marker, keys, model)
+    SCHEMAS.append(schema)
+    return schema
+
+
+def find_schema(entity):
+    """Returns the schema of the first registered type whose marker key the
+    entity carries, or None.
+
+    Parameters:
+        entity (dict): entity to classify.
+
+    Returns:
+        Schema: matching schema.
+    """
+    for schema in SCHEMAS:
+        if schema.marker in entity:
+            return schema
+    return None
+
+
+register_schema('person', 'gender', PEOPLE_KEYS + PEOPLE_LINKS, Person)
+register_schema('planet', 'surface_water', HOTH_KEYS + PLANET_LINKS, Planet)
+register_schema('starship', 'starship_class', STARSHIP_KEYS + STARSHIP_LINKS, Starship)
+register_schema('species', 'classification', SPECIES_KEYS + SPECIES_LINKS, Species)
+register_schema('vehicle', 'vehicle_class', VEHICLE_KEYS + VEHICLE_LINKS, Vehicle)
+
+
+_dependencies = contextvars.ContextVar('swapi_dependencies', default=None)
+
+
+def record_dependency(key, value_digest):
+    """Notes that the pipeline node being computed read a fetched resource, so
+    the node can later be skipped only while that resource is unchanged.
+    Does nothing outside a pipeline node.
+
+    Parameters:
+        key (str): resource url.
+        value_digest (str): digest() of the resource as read.
+
+    Returns:
+        None
+    """
+    dependencies = _dependencies.get()
+    if dependencies is not None:
+        dependencies[key] = value_digest
+
+
+_expansion_level = contextvars.ContextVar('swapi_expansion_level', default=0)
+
+
+class Resolver:
+    """Memoizes cleaned SWAPI entities by url for the lifetime of a run. Concurrent
+    requests for the same url are coalesced: the first caller fetches and cleans
+    the resource while the others wait for its result. Link fields of cleaned
+    entities are handed out as lazy References (one per url) following the
+    resolver's expansion policy and depth.
+    """
+
+    def __init__(self, fetch=None, policy=None, depth=EXPANSION_DEPTH):
+        """Creates an empty resolver.
+
+        Parameters:
+            fetch (function): called with a url to fetch the raw resource;
+                defaults to get_swapi_resource.
+            policy (dict): link field -> 'expand', 'url' or 'skip'; fields not
+                given follow EXPANSION_POLICY.
+            depth (int): links followed away from a top-level entity; links of
+                entities reached at this depth are kept as urls.
+
+        Returns:
+            None
+        """
+        self._fetch = fetch if fetch is not None else get_swapi_resource
+        self.policy = dict(EXPANSION_POLICY, **(policy or {}))
+        self.depth = depth
+        self._handles = {}
+        self._resolved = {}
+        self._digests = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def resolve(self, url, filter_keys):
+        """Returns the cleaned entity at url, fetching and cleaning it only the
+        first time the url is seen.
+
+        Parameters:
+            url (str): resource url (e.g., a person's homeworld).
+            filter_keys (tuple): keys kept when the resource is first cleaned.
+
+        Returns:
+            dict: cleaned entity, shared between all callers.
+        """
+        while True:
+            with self._lock:
+                if url in self._resolved:
+                    self.hits += 1
+                    record_dependency(url, self._digests[url])
+                    return self._resolved[url]
+                event = self._pending.get(url)
+                if event is None:
+                    event = threading.Event()
+                    self._pending[url] = event
+                    self.misses += 1
+                    break
+                self.coalesced += 1
+            with stage('wait'):
+                event.wait()  # owner failed if the url is still unresolved; retry
+
+        try:
+            with stage('expand'):
+                resource = self._fetch(url)
+                token = _expansion_level.set(_expansion_level.get() + 1)
+                try:
+                    entity = clean_data(filter_data(resource, filter_keys), self)
+                finally:
+                    _expansion_level.reset(token)
+                resource_digest = digest(resource)
+            with self._lock:
+                self._resolved[url] = entity
+                self._digests[url] = resource_digest
+        finally:
+            with self._lock:
+                del self._pending[url]
+            event.set()
+        record_dependency(url, resource_digest)
+        return entity
+
+    def reference(self, url, filter_keys):
+        """Returns the lazy handle for a link, or the url itself when the link
+        is beyond the expansion depth. An entity is cleaned once, at the depth
+        it is first reached.
+
+        Parameters:
+            url (str): linked entity url.
+            filter_keys (tuple): keys kept when the entity is cleaned.
+
+        Returns:
+            Reference: handle shared by every link to url (or the url).
+        """
+        if _expansion_level.get() >= self.depth:
+            return url
+        handle = self._handles.get(url)
+        if handle is None:
+            handle = self._handles.setdefault(url, Reference(url, filter_keys, self))
+        return handle
+
+    def stats(self):
+        """Reports how much work memoization and lazy links saved.
+
+        Parameters:
+            None
+
+        Returns:
+            dict: distinct resources resolved, hits, misses, coalesced waits
+                and deferred links (handed out but never resolved).
+        """
+        with self._lock:
+            deferred = sum(1 for handle in list(self._handles.values()) if not handle.resolved)
+            return {'resolved': len(self._resolved), 'hits': self.hits,
+                    'misses': self.misses, 'coalesced': self.coalesced,
+                    'deferred': deferred}
+
+
+_resolver = None
+
+
+def get_resolver():
+    """Returns the process-wide resolver, creating it on first use.
+
+    Parameters:
+        None
+
+    Returns:
+        Resolver: shared resolver instance.
+    """
+    global _resolver
+    if _resolver is None:
+        _resolver = Resolver()
+    return _resolver
+
+
+def clean_data(entity, resolver=None, schema=None):
+    """ This function converts dictionary string values to more appropriate types 
+        such as float , int , list , or, in certain cases, None . 
+        The entity is filtered and cleaned by the compiled schema of its type;
+        entities of no registered type keep all their keys.
+        Link fields (homeworld, species and, if the resolver's policy asks for
+        them, films, vehicles, ...) become lazy References from the resolver,
+        so a linked resource is only fetched when it is used, and once per run.
+    Parameters:
+        entity (dict)
+        resolver (Resolver): defaults to get_resolver().
+        schema (Schema): skips type detection when the caller knows the type.
+    Returns:
+        clean_dict: a mapping with 'cleaned' values to the caller (a Record of
+            the schema's model, or a dict for entities of no registered type)
+    """
+    if resolver is None:
+        resolver = get_resolver()
+    if schema is None:
+        schema = find_schema(entity)
+    if schema is not None and active_metrics() is None:
+        return schema.clean(entity, resolver)  # hot path, uninstrumented
+    with stage('clean'):
+        if schema is not None:
+            return schema.clean(entity, resolver)
+
+        clean_dict={}
+        for key, value in entity.items():
+            converter = _converters.get(key)
+            if converter is None:
+                converter = _converters[key] = compile_converter(key)
+            value = converter(value, resolver)
+            if value is not _DROP:
+                clean_dict[key] = value
+        return clean_dict
+
+
+_ABSENT = object()  # raw cell of an entity lacking the key
+_MISSING = 0  # column mask codes
+_PRESENT = 1
+_NULL = 2
+
+
+def unknown_mask(values):
+    """Vectorized is_unknown: tests each distinct value once.
+
+    Parameters:
+        values (list): column of strings.
+
+    Returns:
+        list: bool per value, True where the value is unknown or n/a.
+    """
+    seen = {}
+    mask = []
+    for value in values:
+        try:
+            mask.append(seen[value])
+        except KeyError:
+            mask.append(seen.setdefault(value, is_unknown(value)))
+    return mask
+
+
+class ColumnBatch:
+    """Columnar view of a list of raw entities restricted to a tuple of keys.
+    clean() converts each column in bulk, parsing every distinct string once,
+    and stores it as a typed array (array('q') for ints, array('d') for floats)
+    whenever all of its values allow it, next to a mask marking missing and
+    null cells. Dicts are only materialized by to_dicts().
+    """
+
+    def __init__(self, entities, keys):
+        """Splits entities into raw columns.
+
+        Parameters:
+            entities (list): raw entities (dicts).
+            keys (tuple): keys to keep, in output order (e.g., PLANET_KEYS).
+
+        Returns:
+            None
+        """
+        self.keys = keys
+        self.length = len(entities)
+        self.columns = {key: [entity.get(key, _ABSENT) for entity in entities] for key in keys}
+        self.masks = {}
+
+    def where_unknown(self, key):
+        """Returns the positions of the rows whose key value is unknown or n/a.
+
+        Parameters:
+            key (str): column to test (e.g., 'population').
+
+        Returns:
+            list: row positions.
+        """
+        column = self.columns[key]
+        if any(value is _ABSENT for value in column):
+            raise KeyError(key)
+        return [row for row, unknown in enumerate(unknown_mask(column)) if unknown]
+
+    def take(self, rows):
+        """Returns a new uncleaned batch holding only the given rows.
+
+        Parameters:
+            rows (list): row positions, in output order.
+
+        Returns:
+            ColumnBatch: the selected rows.
+        """
+        batch = ColumnBatch([], self.keys)
+        batch.length = len(rows)
+        for key in self.keys:
+            column = self.columns[key]
+            batch.columns[key] = [column[row] for row in rows]
+        return batch
+
+    def clean(self, resolver=None):
+        """Converts every column the way clean_data converts the matching key and
+        packs numeric columns into typed arrays.
+
+        Parameters:
+            resolver (Resolver): expands homeworld and species references;
+                defaults to get_resolver().
+
+        Returns:
+            ColumnBatch: this batch, for chaining.
+        """
+        if resolver is None:
+            resolver = get_resolver()
+        for key in self.keys:
+            converter = compile_converter(key)
+            converted = {}
+            values = []
+            mask = bytearray(self.length)
+            for row, value in enumerate(self.columns[key]):
+                if value is _ABSENT:
+                    values.append(None)
+                    continue
+                if type(value) == str:
+                    try:
+                        value = converted[value]
+                    except KeyError:
+                        value = converted.setdefault(value, converter(value, resolver))
+                else:
+                    value = converter(value, resolver)
+                if value is _DROP:
+                    values.append(None)
+                    continue
+                mask[row] = _NULL if value is None else _PRESENT
+                values.append(value)
+            self.columns[key] = pack_column(values, mask)
+            self.masks[key] = mask
+        return self
+
+    def to_dicts(self):
+        """Materializes the cleaned rows as dicts.
+
+        Parameters:
+            None
+
+        Returns:
+            list: one dict per row with the batch keys that row carries.
+        """
+        rows = [{} for _ in range(self.length)]
+        for key in self.keys:
+            column = self.columns[key]
+            mask = self.masks[key]
+            copy = type(column) == list and any(type(value) == list for value in column)
+            for record, value, code in zip(rows, column, mask):
+                if code == _PRESENT:
+                    record[key] = list(value) if copy and type(value) == list else value
+                elif code == _NULL:
+                    record[key] = None
+        return rows
+
+
+def pack_column(values, mask):
+    """Packs a converted column into a typed array when every present value is
+    an int fitting in 64 bits (array('q')) or a float (array('d')); other
+    columns stay lists. Null cells hold 0 in typed arrays.
+
+    Parameters:
+        values (list): converted values.
+        mask (bytearray): _MISSING/_PRESENT/_NULL code per cell.
+
+    Returns:
+        array or list: the packed column.
+    """
+    present = [value for value, code in zip(values, mask) if code == _PRESENT]
+    for typecode, kind in (('q', int), ('d', float)):
+        if present and all(type(value) == kind for value in present):
+            try:
+                return array.array(typecode, [value if code == _PRESENT else 0
+                                              for value, code in zip(values, mask)])
+            except OverflowError:
+                break
+    return values
+
+
+def clean_batch(entities, keys=PLANET_KEYS, unknown_key=None, resolver=None):
+    """Filters and cleans a collection of entities column by column. The output
+    is identical to calling filter_data() and clean_data() on each entity.
+
+    Parameters:
+        entities (list): raw entities of one type.
+        keys (tuple): keys to keep, in output order.
+        unknown_key (str): if given, keep only the rows whose value for this key
+            is unknown or n/a (e.g., 'population' selects uninhabited planets).
+        resolver (Resolver): expands homeworld and species references.
+
+    Returns:
+        list: cleaned entities.
+    """
+    batch = ColumnBatch(entities, keys)
+    if unknown_key is not None:
+        batch = batch.take(batch.where_unknown(unknown_key))
+    return batch.clean(resolver).to_dicts()
+
+
+def iter_clean(entities, keys=PLANET_KEYS, unknown_key=None, batch_size=STREAM_BATCH_SIZE):
+    """Streams entities through clean_batch() a batch at a time, so memory use
+    depends on batch_size rather than on the number of entities.
+
+    Parameters:
+        entities (iterable): raw entities (e.g., from iter_json()).
+        keys (tuple): keys to keep, in output order.
+        unknown_key (str): if given, keep only rows whose value for it is unknown.
+        batch_size (int): entities cleaned together.
+
+    Returns:
+        generator: cleaned entities, in input order.
+    """
+    entities = iter(entities)
+    while True:
+        with stage('read_json'):  # pulling a batch from iter_json() parses it
+            batch = list(itertools.islice(entities, batch_size))
+        if not batch:
+            return
+        with stage('clean'):
+            cleaned = clean_batch(batch, keys, unknown_key)
+        yield from cleaned
+
+
+def _clean_chunk(chunk, keys, unknown_key, resolver=None):
+    """Cleans one chunk of entities: column by column when keys are given,
+    otherwise entity by entity with each entity's schema.
+    """
+    if keys is not None:
+        return clean_batch(chunk, keys, unknown_key, resolver)
+    return [clean_data(entity, resolver) for entity in chunk
+            if unknown_key is None or is_unknown(entity[unknown_key])]
+
+
+def _init_clean_worker(snapshot_path):
+    """Process pool initializer: resolves references from a snapshot when one
+    is given instead of each worker fetching them.
+    """
+    global _resolver
+    if snapshot_path:
+        _resolver = Resolver(load_snapshot(snapshot_path).get)
+
+
+def clean_parallel(entities, keys=None, unknown_key=None, workers=None, chunk_size=None,
+                   snapshot_path=None):
+    """Cleans a large list of entities on a pool of worker processes. Entities
+    are split into a few large contiguous chunks per worker and the results
+    are joined in input order, so the output matches serial cleaning. Inputs
+    smaller than PARALLEL_MIN_ENTITIES are cleaned in this process.
+
+    Parameters:
+        entities (list): raw entities.
+        keys (tuple): keys to keep (column-wise cleaning via clean_batch());
+            None cleans each entity with clean_data().
+        unknown_key (str): if given, keep only rows whose value for it is unknown.
+        workers (int): worker processes; defaults to os.cpu_count().
+        chunk_size (int): entities per task; defaults to an even split into
+            PARALLEL_CHUNKS_PER_WORKER tasks per worker.
+        snapshot_path (str): snapshot used to resolve homeworld/species
+            references locally.
+
+    Returns:
+        list: cleaned entities, in input order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    entities = list(entities)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(entities) < PARALLEL_MIN_ENTITIES:
+        resolver = Resolver(load_snapshot(snapshot_path).get) if snapshot_path else None
+        return _clean_chunk(entities, keys, unknown_key, resolver)
+
+    if chunk_size is None:
+        chunk_size = max(STREAM_BATCH_SIZE,
+                         math.ceil(len(entities) / (workers * PARALLEL_CHUNKS_PER_WORKER)))
+    chunks = [entities[start:start + chunk_size] for start in range(0, len(entities), chunk_size)]
+    with ProcessPoolExecutor(workers, initializer=_init_clean_worker,
+                             initargs=(snapshot_path,)) as pool:
+        parts = pool.map(_clean_chunk, chunks, itertools.repeat(keys),
+                         itertools.repeat(unknown_key))
+        cleaned = share_references([entity for part in parts for entity in part])
+    # references come back unresolved and without a resolver: resolve them here
+    resolver = Resolver(load_snapshot(snapshot_path).get) if snapshot_path else get_resolver()
+    for reference in iter_references(cleaned):
+        if reference.resolver is None:
+            reference.resolver = resolver
+    return cleaned
+
+
+def assign_crew(starship, crew):
+    """ This function assigns crew members to a starship. 
+        Each crew key defines a role (e.g., pilot , copilot , astromech_droid ) 
+        that must be used as the new starship key (e.g., starship['pilot'] ). 
+        The crew value (dict) represents the crew member 
+        (e.g., Han Solo, Chewbacca). 
+    Parameters:
+        starship (dict) 
+        crew (dict)
+    Returns:
+        starship: an updated starship with one or 
+        more new crew member key-value pairs added to the caller. 
+        The starship is not copied: the result is an Overlay sharing it.
+    """
+   
+    return Overlay(starship, crew)
@@ -0,0 +1,187 @@
+"""The swapi-echo command line. Only argparse and logging are imported up front:
+each subcommand imports the swapi_echo modules it needs (and they import
+asyncio, requests or http.server) when it runs, so --help, --version and cache
+stats start quickly.
+Run without a command it builds both output files, as `python "SWAPI echo.py"`
+always has.
+"""
+import argparse, logging, os, sys
+
+from . import __version__
+
+LOG_LEVELS = ('debug', 'info', 'warning', 'error')
+DESCRIPTION = ('Build the uninhabited planets and Echo Base documents from local files and '
+               'the Star Wars API (SWAPI), and manage the crawled snapshots and response '
+               'cache they use. Without a command, runs build.')
+LOG_FORMAT = '%(levelname)s %(name)s: %(message)s'
+
+log = logging.getLogger('swapi_echo')
+
+
+def run_build(args):
+    """Builds the uninhabited planets and Echo Base files (see build.main())."""
+    from .build import main
+    main(full_rebuild=args.full_rebuild)
+
+
+def run_batch(args):
+    """Builds every base document matching a directory or glob (see build.build_batch())."""
+    from .build import build_batch, instrumented
+    with instrumented():
+        written = build_batch(args.pattern, args.output_dir, args.full_rebuild)
+    log.info("%d of %d documents written", sum(written.values()), len(written))
+
+
+def run_crawl(args):
+    """Crawls SWAPI collections into a snapshot (see crawler.crawl())."""
+    from .config import COLLECTIONS, SNAPSHOT_PATH
+    from .crawler import crawl
+    crawl(tuple(args.collections) if args.collections else COLLECTIONS,
+          args.snapshot or SNAPSHOT_PATH)
+
+
+def run_serve(args):
+    """Serves a snapshot as a local SWAPI stand-in (see stub.serve())."""
+    from .stub import serve
+    serve(*[port for port in (args.port,) if port is not None])
+
+
+def run_export(args):
+    """Writes a columnar snapshot (see columnar.export_columnar())."""
+    from .columnar import export_columnar
+    from .config import COLUMNAR_PATH, SNAPSHOT_PATH
+    rows = export_columnar(args.source or SNAPSHOT_PATH, args.target or COLUMNAR_PATH)
+    log.info("exported %s", rows)
+
+
+def run_cache(args):
+    """Prints response cache statistics as JSON, or clears the cache. Neither
+    creates a cache file where there is none.
+    """
+    import json
+    from .cache import ResponseCache
+    from .config import CACHE_PATH
+    path = args.path or os.environ.get('SWAPI_CACHE_PATH', CACHE_PATH)
+    if not os.path.exists(path):
+        print(f"no cache at {path}")
+        return 0
+    cache = ResponseCache(path)
+    try:
+        if args.action == 'clear':
+            cache.clear()
+            log.info("cleared %s", cache.path)
+        else:
+            print(json.dumps(cache.stats(), indent=2))
+    finally:
+        cache.close()
+
+
+def benchmarks_dir():
+    """Returns the benchmarks/ directory of the source checkout, or None when
+    the package is installed without one.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for directory in (os.path.join(root, 'benchmarks'), os.path.join(os.getcwd(), 'benchmarks')):
+        if os.path.isdir(directory):
+            return directory
+    return None
+
+
+def run_bench(args):
+    """Runs benchmarks/suite.py or benchmarks/bench_<name>.py with the remaining
+    arguments, as if it were run from the repository root.
+    """
+    import runpy
+    directory = benchmarks_dir()
+    if directory is None:
+        log.error("benchmarks/ not found; run from a source checkout")
+        return 1
+    path = os.path.join(directory, f'{args.name}.py')
+    if not os.path.exists(path):
+        path = os.path.join(directory, f'bench_{args.name}.py')
+    if not os.path.exists(path):
+        names = sorted(name[:-3].replace('bench_', '', 1) for name in os.listdir(directory)
+                       if name.endswith('.py'))
+        log.error("unknown benchmark %r (available: %s)", args.name, ', '.join(names))
+        return 1
+    sys.argv = [path] + args.arguments
+    sys.path.insert(0, directory)
+    runpy.run_path(path, run_name='__main__')
+
+
+def build_parser():
+    """Returns the argument parser of the swapi-echo command.
+
+    Parameters:
+        None
+
+    Returns:
+        argparse.ArgumentParser: parser with one subparser per command.
+    """
+    parser = argparse.ArgumentParser(prog='swapi-echo', description=DESCRIPTION)
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    parser.add_argument('--log-level', choices=LOG_LEVELS, type=str.lower,
+                        default=os.environ.get('SWAPI_LOG_LEVEL', 'info').lower(),
+                        help='messages shown on stderr (default: $SWAPI_LOG_LEVEL or info)')
+    parser.set_defaults(handler=run_build, full_rebuild=False)
+    commands = parser.add_subparsers(title='commands', metavar='COMMAND')
+
+    build = commands.add_parser('build', help='build the uninhabited planets and Echo Base files')
+    build.add_argument('--full-rebuild', action='store_true',
+                       help='ignore the saved state and rebuild everything')
+    build.set_defaults(handler=run_build)
+
+    batch = commands.add_parser('batch', help='build many base documents in one run')
+    batch.add_argument('pattern', help='glob of base documents, or a directory of *-v1p0.json ones')
+    batch.add_argument('output_dir', nargs='?', help="output directory (default: each document's)")
+    batch.add_argument('--full-rebuild', action='store_true',
+                       help='ignore the saved state and rebuild everything')
+    batch.set_defaults(handler=run_batch)
+
+    crawl = commands.add_parser('crawl', help='crawl SWAPI collections into a snapshot')
+    crawl.add_argument('collections', nargs='*', help='collections to crawl (default: all)')
+    crawl.add_argument('--snapshot', help='snapshot file to write (default: swapi_snapshot-v1p0.json)')
+    crawl.set_defaults(handler=run_crawl)
+
+    serve = commands.add_parser('serve', help='serve a snapshot as a local SWAPI stand-in')
+    serve.add_argument('port', nargs='?', type=int, help='port to listen on (default: 8765)')
+    serve.set_defaults(handler=run_serve)
+
+    export = commands.add_parser('export', help='write a columnar snapshot')
+    export.add_argument('source', nargs='?', help='crawled snapshot or JSON list of entities')
+    export.add_argument('target', nargs='?', help='columnar snapshot to write')
+    export.set_defaults(handler=run_export)
+
+    bench = commands.add_parser('bench', help='run a benchmark from benchmarks/')
+    bench.add_argument('name', nargs='?', default='suite',
+                       help='suite (default) or the NAME of benchmarks/bench_NAME.py')
+    bench.add_argument('arguments', nargs=argparse.REMAINDER, help='arguments for the benchmark')
+    bench.set_defaults(handler=run_bench)
+
+    cache = commands.add_parser('cache', help='inspect the response cache')
+    cache.add_argument('action', choices=('stats', 'clear'))
+    cache.add_argument('--path', help='cache file (default: $SWAPI_CACHE_PATH or swapi_cache.sqlite3)')
+    cache.set_defaults(handler=run_cache)
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the swapi-echo console script.
+
+    Parameters:
+        argv (list): arguments; defaults to sys.argv[1:].
+
+    Returns:
+        int: exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.log_level not in LOG_LEVELS:  # argparse does not check defaults against choices
+        parser.error(f"invalid SWAPI_LOG_LEVEL {os.environ.get('SWAPI_LOG_LEVEL')!r} "
+                     f"(choose from {', '.join(LOG_LEVELS)})")
+    logging.basicConfig(level=args.log_level.upper(), format=LOG_FORMAT)
+    return args.handler(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
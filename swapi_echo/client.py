@@ -0,0 +1,548 @@
+"""HTTP access to SWAPI: the pooled, retrying SwapiClient with its rate
+limiter and circuit breaker, record/replay clients and get_swapi_resource().
+"""
+import json, logging, os, random, threading, time
+from urllib.parse import urlsplit
+
+from .config import (
+    BACKOFF_BASE, BACKOFF_MAX, BREAKER_COOLDOWN, BREAKER_THRESHOLD, CONCURRENCY,
+    CONNECT_TIMEOUT, ENDPOINT, HOST_RATE_BURST, HOST_RATE_LIMIT, MAX_RETRIES, READ_TIMEOUT,
+    RECORDING_VERSION, RETRY_STATUSES,
+)
+from .metrics import active_metrics, count, stage
+from .jsonio import read_json
+from .cache import cache_key, get_response_cache, resource_path
+
+log = logging.getLogger(__name__)
+
+
+class HostRateLimiter:
+    """Thread-safe token bucket per host: up to burst requests may start at once,
+    after which requests to the host are started at rate per second.
+    """
+
+    def __init__(self, rate=HOST_RATE_LIMIT, burst=HOST_RATE_BURST):
+        """Creates a limiter.
+
+        Parameters:
+            rate (float): requests per second allowed per host, sustained.
+            burst (int): bucket size, i.e. requests allowed at once.
+
+        Returns:
+            None
+        """
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # host -> (tokens, monotonic time they were counted)
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        """Blocks until a request to the host of url may be started.
+
+        Parameters:
+            url (str): url about to be requested.
+
+        Returns:
+            None
+        """
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            tokens, counted = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - counted) * self.rate) - 1
+            self._buckets[host] = (tokens, now)
+        if tokens < 0:  # a token owed: wait until it has been refilled
+            time.sleep(-tokens / self.rate)
+
+
+class SwapiError(Exception):
+    """Raised when a SWAPI request fails after all retries."""
+
+
+class CircuitOpenError(SwapiError):
+    """Raised without touching the network while the circuit breaker is open."""
+
+
+class SwapiClient:
+    """Shared HTTP client for SWAPI. Wraps a requests.Session so connections are
+    pooled and kept alive, applies connect/read timeouts, retries 429/5xx replies,
+    connection errors and malformed JSON with exponential backoff and jitter
+    (honouring Retry-After), and stops calling a failing service once
+    BREAKER_THRESHOLD requests in a row have failed after all their retries, so a
+    single bad url cannot stop a crawl.
+    """
+
+    def __init__(self, pool_size=CONCURRENCY, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX,
+                 breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN,
+                 rate_limit=HOST_RATE_LIMIT, rate_burst=HOST_RATE_BURST, endpoint_alias=None):
+        """Creates a client with its own connection pool.
+
+        Parameters:
+            pool_size (int): keep-alive connections kept per host.
+            connect_timeout (float): seconds to wait for a connection.
+            read_timeout (float): seconds to wait for response data.
+            max_retries (int): retries after the first attempt.
+            backoff_base (float): delay before the first retry, doubled each time.
+            backoff_max (float): upper bound of any single delay.
+            breaker_threshold (int): consecutive requests failing all retries that
+                open the circuit.
+            breaker_cooldown (float): seconds the circuit stays open.
+            rate_limit (float): requests per second per host; None disables the limiter.
+            rate_burst (int): requests per host allowed at once before rate_limit applies.
+            endpoint_alias (str): root url (e.g., a local StubServer) that requests
+                for ENDPOINT urls are sent to instead.
+
+        Returns:
+            None
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.limiter = HostRateLimiter(rate_limit, rate_burst) if rate_limit else None
+        self.endpoint_alias = endpoint_alias.rstrip('/') if endpoint_alias else None
+        self.requests = 0
+        self.retries = 0
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+        import requests
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,
+                                                pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _check_circuit(self):
+        """Raises CircuitOpenError while the breaker is open; once the cooldown has
+        passed a single trial request is let through (half-open).
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.breaker_cooldown:
+                raise CircuitOpenError('SWAPI circuit open after repeated failures')
+            self._opened_at = time.monotonic()  # half-open: one trial per cooldown
+
+    def _record(self, ok):
+        """Updates the breaker after a request has succeeded or used up its retries."""
+        with self._lock:
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+            else:
+                self._failures += 1
+                if self._failures >= self.breaker_threshold:
+                    self._opened_at = time.monotonic()
+
+    def _delay(self, attempt, response=None):
+        """Returns the seconds to wait before retry number attempt: the server's
+        Retry-After if given, otherwise full-jitter exponential backoff.
+        """
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                from email.utils import parsedate_to_datetime
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def fetch(self, url, params=None, headers=None):
+        """Issues a GET request, retrying transient failures.
+
+        Parameters:
+            url (str): resource or collection url.
+            params (dict): optional query parameters.
+            headers (dict): optional request headers (e.g., If-None-Match).
+
+        Returns:
+            tuple: the requests.Response and its decoded JSON body (None for a
+                304 Not Modified reply).
+        """
+        import requests
+        if self.endpoint_alias and url.startswith(ENDPOINT):
+            url = self.endpoint_alias + url[len(ENDPOINT):]
+        attempt = 0
+        while True:
+            self._check_circuit()
+            if self.limiter is not None:
+                with stage('throttle'):
+                    self.limiter.acquire(url)
+            response = None
+            try:
+                with self._lock:
+                    self.requests += 1
+                response = self.session.get(url, params=params, headers=headers,
+                                            timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    data = None if response.status_code == 304 else response.json()
+                    self._record(True)
+                    return response, data
+                error = SwapiError(f"{response.status_code} from {response.url}")
+            except (requests.ConnectionError, requests.Timeout, ValueError) as exc:
+                error = exc
+            if attempt >= self.max_retries:
+                self._record(False)
+                raise SwapiError(f"GET {url} failed after {attempt + 1} attempts") from error
+            with self._lock:
+                self.retries += 1
+            time.sleep(self._delay(attempt, response))
+            attempt += 1
+
+    def stats(self):
+        """Reports request and retry counts and the breaker state.
+
+        Parameters:
+            None
+
+        Returns:
+            dict: requests sent, retries and whether the circuit is open.
+        """
+        with self._lock:
+            return {'requests': self.requests, 'retries': self.retries,
+                    'circuit_open': self._opened_at is not None}
+
+    def close(self):
+        """Closes the pooled connections.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        self.session.close()
+
+
+_client = None
+
+
+def get_client():
+    """Returns the process-wide SWAPI client, creating it on first use. The
+    environment selects the kind of client: SWAPI_REPLAY names a recording to
+    answer every request from without the network, SWAPI_RECORD names a file
+    the responses of this run are recorded to (both bypass the response cache),
+    and SWAPI_ENDPOINT_ALIAS sends requests for ENDPOINT urls to another root
+    (e.g., a local StubServer).
+
+    Parameters:
+        None
+
+    Returns:
+        SwapiClient: shared client instance (or a ReplayClient/RecordingClient).
+    """
+    global _client
+    if _client is None:
+        replay_path = os.environ.get('SWAPI_REPLAY')
+        if replay_path:
+            _client = ReplayClient(replay_path)
+        else:
+            _client = SwapiClient(endpoint_alias=os.environ.get('SWAPI_ENDPOINT_ALIAS'))
+            record_path = os.environ.get('SWAPI_RECORD')
+            if record_path:
+                _client = RecordingClient(_client, record_path)
+    return _client
+
+
+def close_client():
+    """Closes the process-wide client if one was created, which also saves the
+    recording of a RecordingClient.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def replay_key(url, params=None):
+    """Builds the key a recorded response is stored under: the cache key of the
+    request with the host left out, so that a recording made against one SWAPI
+    host (or a StubServer) replays for any other.
+
+    Parameters:
+        url (str): resource or collection url.
+        params (dict): optional query parameters.
+
+    Returns:
+        str: host-independent request key (e.g., 'planets?search=hoth').
+    """
+    return cache_key(resource_path(url), params)
+
+
+class ReplayResponse:
+    """The parts of a requests.Response that get_swapi_resource looks at, for
+    responses answered from a recording.
+    """
+
+    def __init__(self, url, status_code=200):
+        """Creates a response.
+
+        Parameters:
+            url (str): requested url.
+            status_code (int): HTTP status to report.
+
+        Returns:
+            None
+        """
+        self.url = url
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = {}
+
+
+class RecordingClient:
+    """Wraps a SwapiClient and keeps the body of every successful response so
+    the run can later be replayed offline by a ReplayClient.
+    """
+
+    def __init__(self, client, path):
+        """Creates a recording client.
+
+        Parameters:
+            client (SwapiClient): client that talks to the network.
+            path (str): recording file written by save() (and close()).
+
+        Returns:
+            None
+        """
+        self.client = client
+        self.path = path
+        self.responses = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url, params=None, headers=None):
+        """Fetches through the wrapped client and records the response. The
+        conditional headers are dropped so that the recording gets full bodies
+        rather than 304 replies.
+
+        Parameters:
+            url (str): resource or collection url.
+            params (dict): optional query parameters.
+            headers (dict): ignored.
+
+        Returns:
+            tuple: the requests.Response and its decoded JSON body.
+        """
+        response, data = self.client.fetch(url, params)
+        if response.ok:
+            with self._lock:
+                self.responses[replay_key(url, params)] = data
+        return response, data
+
+    def stats(self):
+        """Reports the wrapped client's counters and the responses recorded.
+
+        Parameters:
+            None
+
+        Returns:
+            dict: SwapiClient.stats() plus 'recorded'.
+        """
+        stats = self.client.stats()
+        stats['recorded'] = len(self.responses)
+        return stats
+
+    def save(self):
+        """Writes the recording, merged into any recording already at path.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        responses = {}
+        if os.path.exists(self.path):
+            responses = read_recording(self.path)
+        with self._lock:
+            responses.update(self.responses)
+        with open(self.path, 'w') as file:
+            json.dump({'version': RECORDING_VERSION, 'responses': responses},
+                      file, indent=2, sort_keys=True)
+
+    def close(self):
+        """Saves the recording and closes the wrapped client.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        self.save()
+        self.client.close()
+
+
+class ReplayClient:
+    """Answers SWAPI requests from a recording written by RecordingClient and
+    never touches the network; a request that was not recorded raises SwapiError.
+    """
+
+    def __init__(self, path):
+        """Loads a recording.
+
+        Parameters:
+            path (str): recording file.
+
+        Returns:
+            None
+        """
+        self.responses = read_recording(path)
+        self.requests = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, url, params=None, headers=None):
+        """Returns the recorded response for a request.
+
+        Parameters:
+            url (str): resource or collection url.
+            params (dict): optional query parameters.
+            headers (dict): ignored; recorded responses are always complete.
+
+        Returns:
+            tuple: a ReplayResponse and the recorded JSON body.
+        """
+        key = replay_key(url, params)
+        with self._lock:
+            self.requests += 1
+            if key not in self.responses:
+                self.misses += 1
+                raise SwapiError(f"GET {url} is not in the recording")
+        return ReplayResponse(url), self.responses[key]
+
+    def stats(self):
+        """Reports replayed and missing requests.
+
+        Parameters:
+            None
+
+        Returns:
+            dict: requests answered, misses and the recording size.
+        """
+        with self._lock:
+            return {'requests': self.requests, 'misses': self.misses,
+                    'recorded': len(self.responses)}
+
+    def close(self):
+        """Does nothing; present so a ReplayClient can stand in for a SwapiClient.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+
+
+def read_recording(path):
+    """Reads a recording written by RecordingClient.
+
+    Parameters:
+        path (str): recording file.
+
+    Returns:
+        dict: recorded bodies by replay_key().
+    """
+    recording = read_json(path)
+    if recording.get('version') != RECORDING_VERSION:
+        raise ValueError(f"unsupported recording version {recording.get('version')}")
+    return recording['responses']
+
+
+def get_swapi_resource(url, params=None, cache=None, client=None):
+    """This function initiates an HTTP GET request to the SWAPI service 
+    in order to return a representation of a resource. Responses are served
+    from the on-disk cache while fresh; stale entries are revalidated with
+    If-None-Match/If-Modified-Since before being fetched again. Recording and
+    replaying clients bypass the cache, so that every request of a recorded run
+    is recorded and a replay needs nothing but its recording.
+
+    Parameters:
+        url (str) 
+        params (dict)  # value pairs provided as search terms (e.g., {'search': 'yoda'} )
+        cache (ResponseCache): cache to use; defaults to get_response_cache(),
+            pass False to always go to the network. Ignored for a
+            RecordingClient or ReplayClient.
+        client (SwapiClient): pooled client used for requests that reach the
+            network; defaults to get_client().
+ 
+    Returns: 
+        response: data fatched from the url + params
+    """
+    if client is None:
+        client = get_client()
+    count('requests')
+    if cache is False or isinstance(client, (RecordingClient, ReplayClient)):
+        return network_fetch(client, url, params)[1]
+    if cache is None:
+        cache = get_response_cache()
+
+    key = cache_key(url, params)
+    with stage('cache'):
+        entry = cache.get(key)
+    if entry is not None and entry['fresh']:
+        count('cache_hits')
+        return entry['data']
+
+    headers = {}
+    if entry is not None:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+    response, data = network_fetch(client, url, params, headers)
+    if response.status_code == 304 and entry is not None:
+        count('cache_revalidated')
+        with stage('cache'):
+            cache.refresh(key)
+        return entry['data']
+
+    count('cache_misses')
+    if response.ok:
+        with stage('cache'):
+            cache.put(key, url, data, response.headers.get('ETag'),
+                      response.headers.get('Last-Modified'))
+    return data
+
+
+def network_fetch(client, url, params=None, headers=None):
+    """Calls client.fetch(), recording the request's latency and size when
+    instrumentation is on.
+
+    Parameters:
+        client (SwapiClient): client to fetch with.
+        url (str): resource or collection url.
+        params (dict): optional query parameters.
+        headers (dict): optional request headers.
+
+    Returns:
+        tuple: the response and its decoded JSON body, as from client.fetch().
+    """
+    log.debug("GET %s %s", url, params or '')
+    metrics = active_metrics()
+    if metrics is None:
+        return client.fetch(url, params, headers)
+    start = time.perf_counter()
+    with metrics.stage('network'):
+        response, data = client.fetch(url, params, headers)
+    metrics.observe('request_seconds', time.perf_counter() - start)
+    metrics.count('network_requests')
+    metrics.count('bytes_received', len(getattr(response, 'content', b'') or b''))
+    return response, data
@@ -0,0 +1,505 @@
+"""Memory-mapped columnar snapshots (.swcol): the writer, export_columnar()
+and the typed column views read back from them.
+"""
+import array, json, mmap, os, sys, time, zlib
+
+from .config import (
+    COLLECTION_KEYS, COLUMNAR_ALIGNMENT, COLUMNAR_MAGIC, COLUMNAR_PATH, COLUMNAR_VERSION,
+    REFERENCE_KEYS, SNAPSHOT_PATH, SNAPSHOT_VERSION, STREAM_CHUNK_SIZE, float_props, int_props,
+    list_props,
+)
+from .metrics import stage
+from .jsonio import iter_json, read_json, _canonical_encoder
+from .cache import resource_type
+from .clean import ColumnBatch, Resolver, _MISSING, _NULL, _PRESENT
+
+
+_OTHER = 3  # columnar mask code: the cell's value is kept in the column's exceptions
+
+
+def _signed_typecode(low, high):
+    """Returns the smallest signed array typecode holding every int in low..high."""
+    for typecode in ('b', 'h', 'i', 'q'):
+        bits = array.array(typecode).itemsize * 8 - 1
+        if -(1 << bits) <= low and high < 1 << bits:
+            return typecode
+    raise OverflowError(f"{low}..{high} does not fit in 64 bits")
+
+
+def _unsigned_typecode(high):
+    """Returns the smallest unsigned array typecode holding every int in 0..high."""
+    for typecode in ('B', 'H', 'I', 'Q'):
+        if high < 1 << array.array(typecode).itemsize * 8:
+            return typecode
+    raise OverflowError(f"{high} does not fit in 64 bits")
+
+
+def columnar_kind(key, values, mask):
+    """Picks the storage type of a cleaned column: int, float and list columns
+    follow the int_props, float_props and list_props tuples (link fields other
+    than homeworld hold lists of urls); other columns are int when every
+    present value is an int and str otherwise.
+
+    Parameters:
+        key (str): column key.
+        values (list): cleaned values.
+        mask (bytearray): _MISSING/_PRESENT/_NULL code per cell.
+
+    Returns:
+        str: 'int', 'float', 'str' or 'list'.
+    """
+    if key in int_props:
+        return 'int'
+    if key in float_props:
+        return 'float'
+    if key in list_props or (key in REFERENCE_KEYS and key != 'homeworld'):
+        return 'list'
+    present = [value for value, code in zip(values, mask) if code == _PRESENT]
+    if present and all(type(value) == int for value in present):
+        return 'int'
+    return 'str'
+
+
+class ColumnarWriter:
+    """Writes cleaned collections to a columnar snapshot file. Every column is
+    stored as a mask block (one _MISSING/_PRESENT/_NULL/_OTHER byte per row)
+    and typed blocks: ints as the narrowest signed array that holds them,
+    floats as doubles, strings as codes into a zlib-compressed dictionary of
+    their distinct values and lists as codes plus row offsets. Cells that do not
+    fit their column's type (e.g., an unparsed '1,000-2,000' in an int column)
+    are marked _OTHER and kept, as JSON, in the column's exceptions. Numeric
+    blocks stay uncompressed and aligned so readers can map them without
+    copying. A zlib-compressed JSON header describing the tables is written
+    last, followed by its offset, its length and COLUMNAR_MAGIC.
+    """
+
+    def __init__(self, filepath, source=None):
+        """Creates the file.
+
+        Parameters:
+            filepath (str): columnar snapshot to write.
+            source (str): description of where the entities came from.
+
+        Returns:
+            None
+        """
+        self.file = open(filepath, 'wb')
+        self.offset = 0
+        self.header = {'version': COLUMNAR_VERSION, 'byteorder': sys.byteorder,
+                       'source': source, 'created': time.time(), 'collections': {}}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def block(self, data):
+        """Appends a block at the next aligned offset.
+
+        Parameters:
+            data (bytes): block contents.
+
+        Returns:
+            list: [offset, length] of the block.
+        """
+        padding = -self.offset % COLUMNAR_ALIGNMENT
+        self.file.write(b'\0' * padding)
+        self.offset += padding
+        extent = [self.offset, len(data)]
+        self.file.write(data)
+        self.offset += len(data)
+        return extent
+
+    def packed(self, value):
+        """Appends value as a zlib-compressed JSON block."""
+        return self.block(zlib.compress(_canonical_encoder.encode(value).encode('utf8')))
+
+    def write_table(self, kind, batch):
+        """Writes the columns of a cleaned batch as the table of a collection.
+
+        Parameters:
+            kind (str): collection name (e.g., 'planets').
+            batch (ColumnBatch): cleaned batch.
+
+        Returns:
+            None
+        """
+        columns = {}
+        for key in batch.keys:
+            values, mask = batch.columns[key], bytearray(batch.masks[key])
+            column_kind = columnar_kind(key, values, mask)
+            meta = {'kind': column_kind}
+            other = {}
+            if column_kind in ('int', 'float'):
+                accepted = (int,) if column_kind == 'int' else (float,)
+                data = []
+                for row, (value, code) in enumerate(zip(values, mask)):
+                    if code == _PRESENT and type(value) not in accepted:
+                        mask[row], other[row] = _OTHER, value
+                    data.append(value if mask[row] == _PRESENT else 0)
+                if column_kind == 'int':
+                    try:
+                        meta['typecode'] = _signed_typecode(min(data, default=0), max(data, default=0))
+                    except OverflowError:
+                        meta['typecode'] = 'q'
+                        for row, value in enumerate(data):
+                            if not -(1 << 63) <= value < 1 << 63:
+                                mask[row], other[row], data[row] = _OTHER, value, 0
+                else:
+                    meta['typecode'] = 'd'
+                meta['data'] = self.block(array.array(meta['typecode'], data).tobytes())
+            else:
+                dictionary = {}
+                codes = []
+                offsets = [0]
+                for row, (value, code) in enumerate(zip(values, mask)):
+                    if code == _PRESENT:
+                        items = [value] if column_kind == 'str' else value
+                        if type(items) == list and all(type(item) == str for item in items):
+                            codes.extend(dictionary.setdefault(item, len(dictionary)) for item in items)
+                            offsets.append(len(codes))
+                            continue
+                        mask[row], other[row] = _OTHER, value
+                    if column_kind == 'str':
+                        codes.append(0)  # keeps str codes indexed by row
+                    offsets.append(len(codes))
+                meta['typecode'] = _unsigned_typecode(max(len(dictionary) - 1, 0))
+                meta['data'] = self.block(array.array(meta['typecode'], codes).tobytes())
+                meta['dictionary'] = self.packed(list(dictionary))
+                if column_kind == 'list':
+                    meta['offsets_typecode'] = _unsigned_typecode(len(codes))
+                    meta['offsets'] = self.block(array.array(meta['offsets_typecode'], offsets).tobytes())
+            meta['mask'] = self.block(bytes(mask))
+            if other:
+                meta['other'] = self.packed(other)
+            columns[key] = meta
+        self.header['collections'][kind] = {'rows': batch.length, 'keys': list(batch.keys),
+                                            'columns': columns}
+
+    def close(self):
+        """Writes the header and trailer and closes the file.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        if self.file.closed:
+            return
+        header = self.packed(self.header)
+        self.file.write(header[0].to_bytes(8, 'little') + header[1].to_bytes(8, 'little'))
+        self.file.write(COLUMNAR_MAGIC)
+        self.file.close()
+
+
+def export_columnar(source=SNAPSHOT_PATH, target=COLUMNAR_PATH):
+    """Cleans the entities of a crawled snapshot (see crawl_swapi()) or of a JSON
+    list of SWAPI entities (e.g., swapi_planets-v1p0.json, split into
+    collections by url) and writes them as a columnar snapshot. Each collection
+    keeps its COLLECTION_KEYS, cleaned like ColumnBatch does; link fields keep
+    their urls instead of being expanded.
+
+    Parameters:
+        source (str): snapshot or JSON list file.
+        target (str): columnar snapshot to write.
+
+    Returns:
+        dict: collection -> number of rows written.
+    """
+    collections = read_collections(source)
+    with ColumnarWriter(target, os.path.basename(source)) as writer:
+        for kind, entities in collections.items():
+            batch = clean_collection(kind, entities)
+            with stage('write_columnar'):
+                writer.write_table(kind, batch)
+    return {kind: len(entities) for kind, entities in collections.items()}
+
+
+def read_collections(source):
+    """Reads raw entities by collection from a crawled snapshot or from a JSON
+    list of SWAPI entities, which is split into collections by url.
+
+    Parameters:
+        source (str): snapshot or JSON list file.
+
+    Returns:
+        dict: collection name -> list of raw entities.
+    """
+    with open(source, encoding='utf8') as file:
+        listing = file.read(STREAM_CHUNK_SIZE).lstrip()[:1] == '['
+    if not listing:
+        snapshot = read_json(source)
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {snapshot.get('version')}")
+        return snapshot['collections']
+    collections = {}
+    with stage('read_json'):
+        for entity in iter_json(source):
+            collections.setdefault(resource_type(entity['url']), []).append(entity)
+    return collections
+
+
+def clean_collection(kind, entities, resolver=None):
+    """Cleans the entities of a collection column by column, keeping its
+    COLLECTION_KEYS (or every key seen, for other collections).
+
+    Parameters:
+        kind (str): collection name.
+        entities (list): raw entities.
+        resolver (Resolver): defaults to one keeping every link as its url.
+
+    Returns:
+        ColumnBatch: the cleaned batch.
+    """
+    if resolver is None:
+        resolver = Resolver(policy={key: 'url' for key in REFERENCE_KEYS})
+    keys = COLLECTION_KEYS.get(kind) or tuple(dict.fromkeys(key for entity in entities
+                                                             for key in entity))
+    with stage('clean'):
+        return ColumnBatch(entities, keys).clean(resolver)
+
+
+class ColumnarSnapshot:
+    """Read-only view of a columnar snapshot written by ColumnarWriter. The file
+    is memory-mapped: int and float columns and the string codes are
+    memoryviews of the mapping, so nothing is read until it is touched and
+    queries over a few columns never materialize whole records. Dictionaries
+    and exceptions are decompressed on first use. Views handed out become
+    invalid once the snapshot is closed.
+    """
+
+    def __init__(self, filepath=COLUMNAR_PATH):
+        """Maps the file and reads its header.
+
+        Parameters:
+            filepath (str): columnar snapshot.
+
+        Returns:
+            None
+        """
+        with open(filepath, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        self._views = []
+        trailer = self._buffer[-24:]
+        if bytes(trailer[16:]) != COLUMNAR_MAGIC:
+            self.close()
+            raise ValueError(f"{filepath} is not a columnar snapshot")
+        extent = [int.from_bytes(trailer[:8], 'little'), int.from_bytes(trailer[8:16], 'little')]
+        self.header = self.unpack(extent)
+        if self.header.get('version') != COLUMNAR_VERSION:
+            self.close()
+            raise ValueError(f"unsupported columnar snapshot version {self.header.get('version')}")
+        self._swap = self.header['byteorder'] != sys.byteorder
+        self.collections = {kind: ColumnTable(self, kind, meta)
+                            for kind, meta in self.header['collections'].items()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getitem__(self, kind):
+        return self.collections[kind]
+
+    def view(self, extent, typecode='B'):
+        """Returns a block as a typed memoryview of the mapping (a byte-swapped
+        copy when the file was written on a machine of the other byte order).
+
+        Parameters:
+            extent (list): [offset, length] of the block.
+            typecode (str): array typecode of its items.
+
+        Returns:
+            memoryview: the block's items.
+        """
+        offset, length = extent
+        if self._swap and array.array(typecode).itemsize > 1:
+            items = array.array(typecode, self._buffer[offset:offset + length])
+            items.byteswap()
+            return memoryview(items)
+        view = self._buffer[offset:offset + length].cast(typecode)
+        self._views.append(view)
+        return view
+
+    def unpack(self, extent):
+        """Returns a zlib-compressed JSON block, decoded."""
+        offset, length = extent
+        return json.loads(zlib.decompress(self._buffer[offset:offset + length]))
+
+    def close(self):
+        """Releases every view and unmaps the file.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._buffer.release()
+        self._mmap.close()
+
+
+class Column:
+    """One column of a ColumnTable. mask holds a _MISSING/_PRESENT/_NULL/_OTHER
+    code per row and data the typed values (int and float columns) or the
+    dictionary codes (str and list columns), both as memoryviews of the mapped
+    file. Indexing returns the cleaned value of a row, None for null or
+    missing cells.
+    """
+
+    def __init__(self, snapshot, name, meta):
+        """Creates the column's views.
+
+        Parameters:
+            snapshot (ColumnarSnapshot): file holding the column.
+            name (str): column key.
+            meta (dict): column description from the header.
+
+        Returns:
+            None
+        """
+        self.name = name
+        self.kind = meta['kind']
+        self.mask = snapshot.view(meta['mask'])
+        self.data = snapshot.view(meta['data'], meta['typecode'])
+        self.offsets = snapshot.view(meta['offsets'], meta['offsets_typecode']) if 'offsets' in meta else None
+        self._snapshot = snapshot
+        self._meta = meta
+        self._dictionary = None
+        self._other = None
+
+    def __len__(self):
+        return len(self.mask)
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self.mask)))
+
+    @property
+    def dictionary(self):
+        """Distinct values of a str or list column, indexed by code."""
+        if self._dictionary is None and 'dictionary' in self._meta:
+            self._dictionary = self._snapshot.unpack(self._meta['dictionary'])
+        return self._dictionary
+
+    @property
+    def other(self):
+        """Row -> value of the cells marked _OTHER."""
+        if self._other is None:
+            packed = self._meta.get('other')
+            self._other = {int(row): value for row, value in
+                           (self._snapshot.unpack(packed).items() if packed else ())}
+        return self._other
+
+    def __getitem__(self, row):
+        code = self.mask[row]
+        if code == _PRESENT:
+            if self.kind == 'str':
+                return self.dictionary[self.data[row]]
+            if self.kind == 'list':
+                dictionary = self.dictionary
+                return [dictionary[item] for item in self.data[self.offsets[row]:self.offsets[row + 1]]]
+            return self.data[row]
+        if code == _OTHER:
+            return self.other[row]
+        return None
+
+    def rows(self, code):
+        """Returns the rows whose mask holds code.
+
+        Parameters:
+            code (int): _MISSING, _PRESENT, _NULL or _OTHER.
+
+        Returns:
+            list: row positions.
+        """
+        mapping = self._snapshot._mmap  # searched in place, without copying the mask
+        start = self._meta['mask'][0]
+        stop = start + len(self.mask)
+        needle = bytes((code,))
+        rows = []
+        position = mapping.find(needle, start, stop)
+        while position != -1:
+            rows.append(position - start)
+            position = mapping.find(needle, position + 1, stop)
+        return rows
+
+    def nulls(self):
+        """Returns the rows whose value is null (e.g., unknown population)."""
+        return self.rows(_NULL)
+
+
+class ColumnTable:
+    """Rows of one collection of a ColumnarSnapshot, stored column by column."""
+
+    def __init__(self, snapshot, kind, meta):
+        """Describes the table; columns are mapped on first use.
+
+        Parameters:
+            snapshot (ColumnarSnapshot): file holding the table.
+            kind (str): collection name.
+            meta (dict): table description from the header.
+
+        Returns:
+            None
+        """
+        self.kind = kind
+        self.keys = tuple(meta['keys'])
+        self.length = meta['rows']
+        self._snapshot = snapshot
+        self._meta = meta['columns']
+        self._columns = {}
+
+    def __len__(self):
+        return self.length
+
+    def column(self, key):
+        """Returns a column.
+
+        Parameters:
+            key (str): column key (e.g., 'population').
+
+        Returns:
+            Column: the column.
+        """
+        try:
+            return self._columns[key]
+        except KeyError:
+            return self._columns.setdefault(key, Column(self._snapshot, key, self._meta[key]))
+
+    def row(self, position, keys=None):
+        """Materializes one row as the dict ColumnBatch.to_dicts() would build.
+
+        Parameters:
+            position (int): row position.
+            keys (tuple): keys to include; defaults to every column.
+
+        Returns:
+            dict: the row's present and null cells.
+        """
+        record = {}
+        for key in keys or self.keys:
+            column = self.column(key)
+            if column.mask[position] != _MISSING:
+                record[key] = column[position]
+        return record
+
+    def rows(self, positions=None, keys=None):
+        """Materializes rows as dicts.
+
+        Parameters:
+            positions (iterable): row positions; defaults to every row.
+            keys (tuple): keys to include; defaults to every column.
+
+        Returns:
+            generator: one dict per row, in the order of positions.
+        """
+        if positions is None:
+            positions = range(self.length)
+        return (self.row(position, keys) for position in positions)
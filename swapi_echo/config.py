@@ -0,0 +1,141 @@
+"""Settings shared by the swapi_echo modules: SWAPI endpoint and client
+limits, cache sizes, file names, the keys kept per entity type and the Echo
+Base build configuration.
+"""
+
+ENDPOINT = 'https://swapi.co/api'
+
+CONCURRENCY = 8
+HOST_RATE_LIMIT = 10.0  # requests per second per host, sustained
+HOST_RATE_BURST = 2 * CONCURRENCY  # requests a host may receive at once before the rate applies
+
+CONNECT_TIMEOUT = 3.05  # seconds
+READ_TIMEOUT = 15.0
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # seconds, doubled on every retry
+BACKOFF_MAX = 30.0
+BREAKER_THRESHOLD = 5  # consecutive requests failing all their retries that open the circuit
+BREAKER_COOLDOWN = 30.0  # seconds before a trial request is let through
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+CACHE_PATH = 'swapi_cache.sqlite3'
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+CACHE_DEFAULT_TTL = 24 * 60 * 60
+CACHE_TOUCH_INTERVAL = 60  # seconds an entry's last-use time may lag before a hit updates it
+CACHE_TTLS = {
+    'films': 30 * 24 * 60 * 60,
+    'people': 7 * 24 * 60 * 60,
+    'planets': 7 * 24 * 60 * 60,
+    'species': 7 * 24 * 60 * 60,
+    'starships': 7 * 24 * 60 * 60,
+    'vehicles': 7 * 24 * 60 * 60,
+}
+
+PEOPLE_KEYS = ("url","name","height","mass","hair_color","skin_color","eye_color", "birth_year","gender","homeworld","species")
+HOTH_KEYS = ("url","name","system_position","natural_satellites","rotation_period","orbital_period","diameter","climate","gravity","terrain","surface_water","population","indigenous_life_forms")
+PLANET_KEYS = ("url","name","rotation_period","orbital_period","diameter","climate","gravity","terrain","surface_water","population")
+STARSHIP_KEYS = ("url","starship_class","name","model","manufacturer","length","width","max_atmosphering_speed","hyperdrive_rating","MGLT","crew","passengers","cargo_capacity","consumables","armament")
+SPECIES_KEYS = ("url","name","classification","designation","average_height","skin_colors","hair_colors", "eye_colors","average_lifespan","language")
+VEHICLE_KEYS =  ("url","vehicle_class","name","model","manufacturer","length","max_atmosphering_speed","crew", "passengers","cargo_capacity","consumables","armament")
+FILM_KEYS = ("url","title","episode_id","director","producer","release_date")
+# link fields cleaned only when the expansion policy asks for them
+PEOPLE_LINKS = ("films","vehicles","starships")
+PLANET_LINKS = ("residents","films")
+STARSHIP_LINKS = ("pilots","films")
+SPECIES_LINKS = ("people","films")
+VEHICLE_LINKS = ("pilots","films")
+FILM_LINKS = ("characters","planets","starships","vehicles","species")
+
+INPUTPLANET = 'swapi_planets-v1p0.json'
+OUTPUTPLANET = 'swapi_planets_uninhabited-v1p1.json'
+
+INPUTECHO = 'swapi_echo_base-v1p0.json'
+OUTPUTECHO = 'swapi_echo_base-v1p1.json'
+
+STREAM_CHUNK_SIZE = 64 * 1024  # characters read at a time by iter_json
+STREAM_BATCH_SIZE = 1000  # entities cleaned together by iter_clean
+PARALLEL_MIN_ENTITIES = 20000  # smaller inputs are cleaned serially
+PARALLEL_CHUNKS_PER_WORKER = 4  # few large chunks keep pickling overhead low
+
+PIPELINE_STATE_PATH = 'swapi_echo_base.state.json'
+PIPELINE_STATE_VERSION = 1
+BATCH_STATE_PATH = 'swapi_batch.state.json'
+
+# Echo Base build configuration. SWAPI lookups: node -> (collection, search term).
+ECHO_BASE_SEARCHES = {
+    'swapi_hoth': ('planets', 'hoth'),
+    'swapi_snowspeeder': ('vehicles', 'snowspeeder'),
+    'swapi_x_wing': ('starships', ' t-65 x-wing'),
+    'swapi_transport': ('starships', 'gr-75 medium transport'),
+    'swapi_falcon': ('starships', 'millennium Falcon'),
+}
+# People looked up by name and cleaned: node -> search term.
+ECHO_BASE_PEOPLE = {
+    'han': 'han solo',
+    'chewbacca': 'chewbacca',
+    'leia': 'leia organa',
+    'c_3po': 'c-3po',
+    'luke': 'luke skywalker',
+    'r2_d2': 'r2-d2',
+    'wedge': 'wedge antilles',
+    'r5_d4': 'r5-d4',
+}
+# Document sections enriched in place: node -> (path, SWAPI lookup node or None, keys).
+ECHO_BASE_ASSETS = {
+    'hoth': (('location', 'planet'), 'swapi_hoth', HOTH_KEYS),
+    'commander': (('garrison', 'commander'), None, PEOPLE_KEYS),
+    'smuggler': (('visiting_starships', 'freighters', 1, 'pilot'), None, PEOPLE_KEYS),
+    'snowspeeder': (('vehicle_assets', 'snowspeeders', 0, 'type'), 'swapi_snowspeeder', VEHICLE_KEYS),
+    'x_wing': (('starship_assets', 'starfighters', 0, 'type'), 'swapi_x_wing', STARSHIP_KEYS),
+    'transport': (('starship_assets', 'transports', 0, 'type'), 'swapi_transport', STARSHIP_KEYS),
+    'falcon': (('visiting_starships', 'freighters', 0), 'swapi_falcon', STARSHIP_KEYS),
+}
+# Crewed starships replacing their asset in the document: node -> (starship node, {role: person node}).
+ECHO_BASE_CREWS = {
+    'falcon_crewed': ('falcon', {'pilot': 'han', 'copilot': 'chewbacca'}),
+}
+# Evacuation transport and its passengers and escorts (starship node, {role: person node}).
+EVACUATION_TRANSPORT = ('transport', 'Bright Hope')
+EVACUATION_PASSENGERS = ('leia', 'c_3po')
+EVACUATION_ESCORTS = (
+    ('x_wing', {'pilot': 'luke', 'astromech_droid': 'r2_d2'}),
+    ('x_wing', {'pilot': 'wedge', 'astromech_droid': 'r5_d4'}),
+)
+
+COLLECTIONS = ('people', 'planets', 'starships', 'vehicles', 'species', 'films')
+SEARCH_FIELDS = {'films': ('title',), 'starships': ('name', 'model'),
+                 'vehicles': ('name', 'model')}  # everything else searches 'name'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PATH = 'swapi_snapshot-v1p0.json'
+CHECKPOINT_PATH = 'swapi_snapshot.checkpoint.ndjson'
+COLUMNAR_VERSION = 1
+COLUMNAR_PATH = 'swapi_snapshot-v1p0.swcol'
+COLUMNAR_MAGIC = b'SWCOL\x00\x00\x01'  # last 8 bytes of every columnar file
+COLUMNAR_ALIGNMENT = 8  # bytes; blocks start aligned so typed views need no copy
+RECORDING_VERSION = 1
+FIXTURES_PATH = 'swapi_fixtures-v1p0.json'  # snapshot served by StubServer
+STUB_PAGE_SIZE = 10  # results per page, as on SWAPI
+CONVERTER_CACHE_SIZE = 4096  # distinct values remembered per converter
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+
+float_props = ('gravity', 'length', 'hyperdrive_rating', )
+int_props = ('rotation_period', 'orbital_period', 'diameter', 'surface_water', 'population', 'height', 'mass', 'average_height', 'average_lifespan', 'max_atmosphering_speed', 'MGLT', 'crew', 'passengers', 'cargo_capacity') 
+list_props = ('hair_color', 'skin_color','climate', 'terrain','skin_colors','hair_colors','eye_colors',)
+dict_props = ('homeworld', 'species')
+
+# link fields -> filter keys of the entities they point to
+REFERENCE_KEYS = {
+    'homeworld': PLANET_KEYS, 'species': SPECIES_KEYS, 'films': FILM_KEYS,
+    'vehicles': VEHICLE_KEYS, 'starships': STARSHIP_KEYS, 'pilots': PEOPLE_KEYS,
+    'residents': PEOPLE_KEYS, 'characters': PEOPLE_KEYS, 'people': PEOPLE_KEYS,
+    'planets': PLANET_KEYS,
+}
+# per link field: 'expand' (lazy Reference), 'url' (keep the link) or 'skip' (drop the key)
+EXPANSION_POLICY = {key: 'expand' if key in dict_props else 'skip' for key in REFERENCE_KEYS}
+EXPANSION_DEPTH = 1  # links followed from a cleaned entity before links are kept as urls
+# collection -> keys kept in columnar snapshots, links included (as urls)
+COLLECTION_KEYS = {
+    'people': PEOPLE_KEYS + PEOPLE_LINKS, 'planets': PLANET_KEYS + PLANET_LINKS,
+    'starships': STARSHIP_KEYS + STARSHIP_LINKS, 'vehicles': VEHICLE_KEYS + VEHICLE_LINKS,
+    'species': SPECIES_KEYS + SPECIES_LINKS, 'films': FILM_KEYS + FILM_LINKS,
+}
@@ -0,0 +1,154 @@
+"""Crawling whole SWAPI collections into a snapshot, resumable from a
+checkpoint.
+"""
+import json, logging, math, os, time
+
+from .config import CHECKPOINT_PATH, COLLECTIONS, ENDPOINT, SNAPSHOT_PATH, SNAPSHOT_VERSION
+from .jsonio import write_json
+from .cache import close_response_cache
+from .client import close_client
+from .engine import AsyncEngine
+
+log = logging.getLogger(__name__)
+
+
+def read_checkpoint(checkpoint_path):
+    """Reads the pages saved by an interrupted crawl.
+
+    Parameters:
+        checkpoint_path (str): NDJSON checkpoint file, one page per line.
+
+    Returns:
+        dict: {collection: {'count': int, 'pages': {page (int): results (list)},
+            'next': {page (int): url of the following page, None on the last}}}.
+    """
+    done = {}
+    if not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, 'r', encoding='utf8') as read_obj:
+        for line in read_obj:
+            try:
+                page = json.loads(line)
+            except ValueError:
+                break  # torn final line from a crash mid-write
+            state = done.setdefault(page['collection'], {'count': None, 'pages': {}, 'next': {}})
+            if page.get('count') is not None:
+                state['count'] = page['count']
+            state['pages'][page['page']] = page['results']
+            if 'next' in page:
+                state['next'][page['page']] = page['next']
+    return done
+
+
+async def crawl_collection(engine, endpoint, collection, state, checkpoint):
+    """Fetches every page of one SWAPI collection that is not already in state.
+    Once the first page gives the item count the remaining pages are fetched
+    concurrently; without a count the crawl follows the 'next' links instead,
+    resuming from the link saved with the last checkpointed page. A checkpoint
+    that has neither raises ValueError rather than returning part of the
+    collection.
+
+    Parameters:
+        engine (AsyncEngine): fetch engine.
+        endpoint (str): SWAPI root url.
+        collection (str): collection name (e.g., 'people').
+        state (dict): {'count': int, 'pages': dict, 'next': dict} checkpointed
+            progress (see read_checkpoint()), updated in place.
+        checkpoint (file): open checkpoint file; each fetched page is appended.
+
+    Returns:
+        list: every entity of the collection in page order.
+    """
+    import asyncio
+    url = f"{endpoint}/{collection}/"
+
+    def save(number, page):
+        state['pages'][number] = page['results']
+        state['next'][number] = page.get('next')
+        if page.get('count') is not None:
+            state['count'] = page['count']
+        checkpoint.write(json.dumps({'collection': collection, 'page': number,
+                                     'count': page.get('count'), 'next': page.get('next'),
+                                     'results': page['results']}) + '\n')
+        checkpoint.flush()
+
+    if 1 not in state['pages']:
+        save(1, await engine.get(url))
+
+    per_page = len(state['pages'][1])
+    if state['count'] is not None and per_page:
+        page_count = math.ceil(state['count'] / per_page)
+        missing = [n for n in range(2, page_count + 1) if n not in state['pages']]
+
+        async def fetch_page(number):
+            save(number, await engine.get(url, {'page': number}))
+
+        await asyncio.gather(*(fetch_page(number) for number in missing))
+    else:
+        number = max(state['pages'])
+        if state['count'] is None and number not in state['next']:
+            raise ValueError(f"{collection}: checkpointed page {number} has no count or "
+                             f"'next' link to resume from; remove the checkpoint to crawl again")
+        next_url = state['next'].get(number)
+        while next_url:
+            number += 1
+            page = await engine.get(next_url)
+            save(number, page)
+            next_url = page.get('next')
+
+    return [entity for number in sorted(state['pages']) for entity in state['pages'][number]]
+
+
+async def crawl_swapi(endpoint=ENDPOINT, collections=COLLECTIONS, engine=None,
+                      snapshot_path=SNAPSHOT_PATH, checkpoint_path=CHECKPOINT_PATH):
+    """Crawls whole SWAPI collections into a local snapshot. Progress is appended
+    to a checkpoint file so an interrupted crawl resumes where it stopped; the
+    checkpoint is removed once the snapshot has been written.
+
+    Parameters:
+        endpoint (str): SWAPI root url.
+        collections (tuple): collection names to crawl.
+        engine (AsyncEngine): fetch engine; defaults to a new AsyncEngine.
+        snapshot_path (str): snapshot file to write.
+        checkpoint_path (str): checkpoint file used to resume.
+
+    Returns:
+        dict: the snapshot document.
+    """
+    import asyncio
+    if engine is None:
+        engine = AsyncEngine()
+    done = read_checkpoint(checkpoint_path)
+    with open(checkpoint_path, 'a', encoding='utf8') as checkpoint:
+        results = await asyncio.gather(*(
+            crawl_collection(engine, endpoint, collection,
+                             done.setdefault(collection, {'count': None, 'pages': {}, 'next': {}}),
+                             checkpoint)
+            for collection in collections))
+
+    snapshot = {'version': SNAPSHOT_VERSION, 'endpoint': endpoint,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'collections': dict(zip(collections, results))}
+    write_json(snapshot_path, snapshot)
+    os.remove(checkpoint_path)
+    log.info("crawled %s into %s", {collection: len(entities) for collection, entities
+                                    in snapshot['collections'].items()}, snapshot_path)
+    return snapshot
+
+
+def crawl(collections=COLLECTIONS, snapshot_path=SNAPSHOT_PATH):
+    """Runs crawl_swapi() to completion and closes the shared client.
+
+    Parameters:
+        collections (tuple): collection names to crawl.
+        snapshot_path (str): snapshot file to write.
+
+    Returns:
+        dict: the snapshot document.
+    """
+    import asyncio
+    try:
+        return asyncio.run(crawl_swapi(collections=collections, snapshot_path=snapshot_path))
+    finally:
+        close_client()
+        close_response_cache()
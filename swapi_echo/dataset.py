@@ -0,0 +1,447 @@
+"""Queries over cleaned entities: Dataset with secondary indexes and the
+lazy, immutable Query builder.
+"""
+import itertools, os
+from collections.abc import Mapping
+
+from .config import COLUMNAR_MAGIC, REFERENCE_KEYS
+from .models import Overlay, Reference
+from .cache import resource_path
+from .clean import filter_data, _ABSENT
+from .columnar import ColumnarSnapshot, clean_collection, read_collections
+
+
+def _contains(container, item):
+    return item in container
+
+
+# where() operators: name -> test(row value, operand)
+QUERY_OPERATORS = {
+    '==': lambda value, operand: value == operand,
+    '!=': lambda value, operand: value != operand,
+    '<': lambda value, operand: value < operand,
+    '<=': lambda value, operand: value <= operand,
+    '>': lambda value, operand: value > operand,
+    '>=': lambda value, operand: value >= operand,
+    'is': lambda value, operand: value is operand,
+    'is not': lambda value, operand: value is not operand,
+    'in': lambda value, operand: value in operand,
+    'contains': _contains,
+}
+
+
+def link_url(value):
+    """Returns the url a link value points to: the url itself, a Reference's url
+    or the 'url' of an expanded entity (None for anything else).
+    """
+    if type(value) == str:
+        return value
+    if isinstance(value, Reference):
+        return value.url
+    if isinstance(value, Mapping):
+        return value.get('url')
+    return None
+
+
+class Dataset:
+    """Cleaned entities by collection, queried through Query. Entities are
+    found by url for joins, and secondary indexes created with create_index()
+    let where() look rows up instead of scanning the collection.
+    """
+
+    def __init__(self, collections=None):
+        """Creates a dataset.
+
+        Parameters:
+            collections (dict): collection name -> iterable of cleaned entities.
+
+        Returns:
+            None
+        """
+        self.collections = {}
+        self.indexes = {}  # (kind, key) -> {value: [positions]}
+        self.index_shapes = {}  # (kind, key) -> set of 'value', 'list', 'link' indexed
+        self._by_path = {}
+        for kind, entities in (collections or {}).items():
+            self.add(kind, entities)
+
+    @classmethod
+    def from_file(cls, filepath, indexes=()):
+        """Loads a columnar snapshot (see export_columnar()), a crawled snapshot
+        or a JSON list of SWAPI entities, cleaned as export_columnar() cleans
+        them (links are kept as urls).
+
+        Parameters:
+            filepath (str): file to load.
+            indexes (tuple): (collection, key) pairs to index.
+
+        Returns:
+            Dataset: the loaded dataset.
+        """
+        with open(filepath, 'rb') as file:
+            file.seek(-len(COLUMNAR_MAGIC), os.SEEK_END)
+            columnar = file.read() == COLUMNAR_MAGIC
+        dataset = cls()
+        if columnar:
+            with ColumnarSnapshot(filepath) as snapshot:
+                for kind, table in snapshot.collections.items():
+                    dataset.add(kind, table.rows())
+        else:
+            for kind, entities in read_collections(filepath).items():
+                dataset.add(kind, clean_collection(kind, entities).to_dicts())
+        for kind, key in indexes:
+            dataset.create_index(kind, key)
+        return dataset
+
+    def add(self, kind, entities):
+        """Appends cleaned entities to a collection, updating its indexes.
+
+        Parameters:
+            kind (str): collection name.
+            entities (iterable): cleaned entities.
+
+        Returns:
+            Dataset: this dataset, for chaining.
+        """
+        collection = self.collections.setdefault(kind, [])
+        start = len(collection)
+        collection.extend(entities)
+        for position in range(start, len(collection)):
+            url = collection[position].get('url')
+            if url is not None:
+                self._by_path[resource_path(url)] = collection[position]
+        for (indexed, key), index in self.indexes.items():
+            if indexed == kind:
+                self._index_rows(index, self.index_shapes[(kind, key)], collection, key, start)
+        return self
+
+    def create_index(self, kind, key):
+        """Indexes a collection by the values of a key. Rows holding a list are
+        indexed under each of its items (for the 'contains' operator) and links
+        under their urls.
+
+        Parameters:
+            kind (str): collection name (e.g., 'planets').
+            key (str): indexed key (e.g., 'population').
+
+        Returns:
+            dict: value -> row positions.
+        """
+        index = self.indexes[(kind, key)] = {}
+        shapes = self.index_shapes[(kind, key)] = set()
+        self._index_rows(index, shapes, self.collections.get(kind, []), key, 0)
+        return index
+
+    @staticmethod
+    def _index_rows(index, shapes, collection, key, start):
+        for position in range(start, len(collection)):
+            value = collection[position].get(key, _ABSENT)
+            if value is _ABSENT:
+                continue
+            shapes.add('list' if type(value) == list else 'value')
+            for item in (value if type(value) == list else (value,)):
+                if isinstance(item, Mapping):
+                    shapes.add('link')
+                    item = link_url(item)
+                try:
+                    index.setdefault(item, []).append(position)
+                except TypeError:  # unhashable values are only found by scanning
+                    shapes.add('unhashable')
+
+    def by_url(self, url):
+        """Returns the entity at url, or None.
+
+        Parameters:
+            url (str): resource url from any SWAPI host.
+
+        Returns:
+            Mapping: cleaned entity.
+        """
+        return self._by_path.get(resource_path(url))
+
+    def query(self, kind):
+        """Starts a query over a collection.
+
+        Parameters:
+            kind (str): collection name.
+
+        Returns:
+            Query: query yielding the collection's entities.
+        """
+        return Query(self.collections.get(kind, []), self, kind)
+
+
+class Query:
+    """Lazy query over cleaned entities: where() filters, join() follows link
+    fields, select() projects onto a key tuple, order_by() and limit() shape the
+    result and count(), sum(), min(), max(), avg() and group_by() aggregate it.
+    Every method returns a new query; rows are produced when it is iterated.
+    When the query runs over a Dataset collection and its first step is a
+    where() the dataset has an index for, the matching rows are looked up in
+    the index instead of scanning the collection.
+    """
+
+    def __init__(self, source, dataset=None, kind=None):
+        """Creates a query.
+
+        Parameters:
+            source (iterable): cleaned entities; iterators are consumed lazily.
+            dataset (Dataset): dataset joins are resolved against.
+            kind (str): collection of dataset that source is.
+
+        Returns:
+            None
+        """
+        self.source = source
+        self.dataset = dataset
+        self.kind = kind
+        self.steps = ()
+        self.ordering = None
+        self.count_limit = None
+
+    def _derive(self, step=None, **changes):
+        query = object.__new__(Query)
+        query.__dict__.update(self.__dict__)
+        if step is not None:
+            query.steps = self.steps + (step,)
+        query.__dict__.update(changes)
+        return query
+
+    def where(self, key, op='==', operand=None):
+        """Keeps the rows whose value for key passes op against operand (see
+        QUERY_OPERATORS); key may instead be a function of the row. Rows lacking
+        the key, or whose value cannot be compared, are dropped.
+
+        Parameters:
+            key (str or function): key tested, or predicate called with the row.
+            op (str): operator (e.g., '==', '>=', 'is', 'contains').
+            operand: value compared against.
+
+        Returns:
+            Query: the filtered query.
+        """
+        if callable(key):
+            return self._derive(('where', key, None, None))
+        return self._derive(('where', key, QUERY_OPERATORS[op], operand))
+
+    def join(self, key, keys=None, inner=False):
+        """Replaces the link field key (a url, a list of urls or References) by
+        the entities it points to, looked up in the dataset.
+
+        Parameters:
+            key (str): link field (e.g., 'homeworld', 'pilots').
+            keys (tuple): keys kept of the joined entities; defaults to
+                REFERENCE_KEYS[key].
+            inner (bool): drop rows with nothing to join instead of keeping
+                their link as it is.
+
+        Returns:
+            Query: the joined query.
+        """
+        if self.dataset is None:
+            raise ValueError("join() needs a query created by Dataset.query()")
+        return self._derive(('join', key, keys or REFERENCE_KEYS.get(key), inner))
+
+    def select(self, keys):
+        """Projects rows onto keys, as filter_data() does.
+
+        Parameters:
+            keys (tuple): keys to keep, in output order (e.g., PLANET_KEYS).
+
+        Returns:
+            Query: the projected query.
+        """
+        return self._derive(('select', tuple(keys), None, None))
+
+    def order_by(self, key, reverse=False):
+        """Sorts rows by a key (or a function of the row); null and missing
+        values sort last.
+
+        Parameters:
+            key (str or function): sort key.
+            reverse (bool): sort descending.
+
+        Returns:
+            Query: the ordered query.
+        """
+        return self._derive(ordering=(key, reverse))
+
+    def limit(self, count):
+        """Keeps at most count rows.
+
+        Parameters:
+            count (int): maximum number of rows.
+
+        Returns:
+            Query: the limited query.
+        """
+        return self._derive(count_limit=count)
+
+    def _rows(self):
+        rows = self.source
+        steps = self.steps
+        if steps and steps[0][0] == 'where' and self.dataset is not None:
+            positions = self._lookup(*steps[0][1:])
+            if positions is not None:
+                collection = self.dataset.collections[self.kind]
+                rows = (collection[position] for position in positions)
+                steps = steps[1:]
+        for step, key, argument, operand in steps:
+            if step == 'where':
+                rows = _filter_rows(rows, key, argument, operand)
+            elif step == 'join':
+                rows = self._join_rows(rows, key, argument, operand)
+            else:
+                rows = ({field: row[field] for field in key if field in row} for row in rows)
+        return rows
+
+    def _lookup(self, key, test, operand):
+        """Returns the positions an index gives for a where() step, or None when
+        the step cannot use one. Indexes of list or link values hold list items
+        and urls too, so their candidates are checked like scanned rows.
+        """
+        index = self.dataset.indexes.get((self.kind, key))
+        if index is None:
+            return None
+        shapes = self.dataset.index_shapes[(self.kind, key)]
+        if 'unhashable' in shapes:
+            return None
+        try:
+            if test is QUERY_OPERATORS['contains']:
+                if shapes & {'value', 'link'}:  # str values contain substrings
+                    return None
+                candidates = index.get(operand, ())
+            elif test is QUERY_OPERATORS['in']:
+                candidates = {position for value in operand for position in index.get(value, ())}
+            elif test is QUERY_OPERATORS['=='] or (test is QUERY_OPERATORS['is'] and operand is None):
+                candidates = index.get(operand, ())
+            else:
+                return None
+        except TypeError:  # unhashable operand
+            return None
+        positions = sorted(candidates)
+        if shapes == {'value'} or test is QUERY_OPERATORS['contains']:
+            return positions
+        collection = self.dataset.collections[self.kind]
+        return [position for position in positions
+                if any(_filter_rows((collection[position],), key, test, operand))]
+
+    def _join_rows(self, rows, key, keys, inner):
+        by_url = self.dataset.by_url
+        for row in rows:
+            value = row.get(key, _ABSENT)
+            if value is _ABSENT or value is None:
+                if not inner:
+                    yield row
+                continue
+            if type(value) == list:
+                targets = [by_url(link_url(item)) for item in value]
+                joined = [filter_data(target, keys) if keys else target
+                          for target in targets if target is not None]
+                found = bool(joined) or not value
+            else:
+                target = by_url(link_url(value))
+                joined = None if target is None else filter_data(target, keys) if keys else target
+                found = target is not None
+            if found:
+                yield Overlay(row, {key: joined})
+            elif not inner:
+                yield row
+
+    def __iter__(self):
+        rows = self._rows()
+        if self.ordering is not None:
+            key, reverse = self.ordering
+            value = key if callable(key) else (lambda row: row.get(key))
+            present = []
+            absent = []
+            for row in rows:
+                (absent if value(row) is None else present).append(row)
+            rows = sorted(present, key=value, reverse=reverse) + absent
+        if self.count_limit is not None:
+            rows = itertools.islice(rows, self.count_limit)
+        return iter(rows)
+
+    def all(self):
+        """Returns the rows as a list."""
+        return list(self)
+
+    def first(self):
+        """Returns the first row, or None."""
+        return next(iter(self), None)
+
+    def values(self, key=None):
+        """Returns a generator of each row's value for key (or of the rows
+        themselves), leaving out missing and null values.
+        """
+        if key is None:
+            return (row for row in self if row is not None)
+        value = key if callable(key) else (lambda row: row.get(key))
+        return (result for result in map(value, self) if result is not None)
+
+    def count(self):
+        """Returns the number of rows."""
+        return sum(1 for _ in self)
+
+    def sum(self, key=None):
+        """Returns the sum of key (a key, a function of the row, or None for the
+        rows themselves) over the rows, skipping nulls.
+        """
+        return sum(self.values(key))
+
+    def min(self, key=None):
+        """Returns the smallest value of key over the rows, or None."""
+        return min(self.values(key), default=None)
+
+    def max(self, key=None):
+        """Returns the largest value of key over the rows, or None."""
+        return max(self.values(key), default=None)
+
+    def avg(self, key=None):
+        """Returns the mean value of key over the rows, or None."""
+        values = list(self.values(key))
+        return sum(values) / len(values) if values else None
+
+    def group_by(self, key):
+        """Groups rows by the value of key (or of a function of the row).
+
+        Parameters:
+            key (str or function): grouping key.
+
+        Returns:
+            dict: value -> Query over the rows of the group, in order.
+        """
+        value = key if callable(key) else (lambda row: row.get(key))
+        groups = {}
+        for row in self:
+            groups.setdefault(value(row), []).append(row)
+        return {group: Query(rows, self.dataset, None) for group, rows in groups.items()}
+
+
+def _filter_rows(rows, key, test, operand):
+    """Yields the rows passing a where() step."""
+    if test is None:
+        yield from filter(key, rows)
+        return
+    for row in rows:
+        value = row.get(key, _ABSENT)
+        if value is _ABSENT:
+            continue
+        try:
+            if test(value, operand):
+                yield row
+        except TypeError:
+            continue
+
+
+def query(entities):
+    """Starts a query over any iterable of cleaned entities (e.g., the output of
+    iter_clean()); joins need Dataset.query() instead.
+
+    Parameters:
+        entities (iterable): cleaned entities.
+
+    Returns:
+        Query: query yielding the entities.
+    """
+    return Query(entities)
@@ -0,0 +1,161 @@
+"""AsyncEngine: runs blocking fetches and cleaning on worker threads with
+bounded concurrency and shared, coalesced requests.
+"""
+
+from .config import CONCURRENCY
+from .metrics import count
+from .models import iter_references
+from .cache import cache_key
+from .client import get_client, get_swapi_resource
+from .clean import Resolver, clean_data, filter_data
+
+
+class AsyncEngine:
+    """Runs blocking SWAPI fetches and cleaning on worker threads so independent
+    lookups proceed together. At most concurrency jobs run at once; requests that
+    reach the network share the client's connection pool and rate limit. get()
+    requests are memoized for the engine's lifetime, so documents built on one
+    engine fetch every url and search once between them.
+    """
+
+    def __init__(self, concurrency=CONCURRENCY, client=None, resolver=None, cache=None,
+                 source=None):
+        """Creates an engine; it must be used from within a running event loop.
+
+        Parameters:
+            concurrency (int): maximum number of jobs in flight.
+            client (SwapiClient): client sending the requests (and applying its
+                rate limit); defaults to get_client().
+            resolver (Resolver): resolver for homeworld/species references;
+                defaults to a new resolver fetching through this engine's limits.
+            cache (ResponseCache): response cache; defaults to get_response_cache().
+            source (EntityStore): local data answering every fetch instead
+                of the network.
+
+        Returns:
+            None
+        """
+        import asyncio
+        self.source = source
+        self.concurrency = concurrency
+        self.client = client if client is not None else get_client()
+        self.cache = cache
+        self.resolver = resolver if resolver is not None else Resolver(self.fetch)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._requests = {}  # cache_key() -> task fetching it
+        self.coalesced = 0
+
+    def fetch(self, url, params=None):
+        """Blocking fetch through this engine's cache and client.
+
+        Parameters:
+            url (str): resource or collection url.
+            params (dict): optional query parameters.
+
+        Returns:
+            dict: decoded JSON response.
+        """
+        if self.source is not None:
+            count('source_requests')
+            return self.source.get(url, params)
+        return get_swapi_resource(url, params, self.cache, self.client)
+
+    async def run(self, func, *args):
+        """Runs func(*args) on a worker thread once a concurrency slot is free.
+
+        Parameters:
+            func (function): blocking callable.
+            args: positional arguments passed to func.
+
+        Returns:
+            object: func's return value.
+        """
+        import asyncio
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    async def get(self, url, params=None):
+        """Fetches a SWAPI resource. Requests already made (or in flight) on this
+        engine share the first request's response; failed requests are
+        forgotten so a later caller tries again.
+
+        Parameters:
+            url (str): resource or collection url.
+            params (dict): optional query parameters.
+
+        Returns:
+            dict: decoded JSON response.
+        """
+        import asyncio
+        key = cache_key(url, params)
+        task = self._requests.get(key)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            task = self._requests[key] = asyncio.ensure_future(self.run(self.fetch, url, params))
+        else:
+            self.coalesced += 1
+            count('engine_coalesced')
+        return await asyncio.shield(task)
+
+    async def search(self, url, term):
+        """Returns the first result of a SWAPI search.
+
+        Parameters:
+            url (str): collection url (e.g., f"{ENDPOINT}/people/").
+            term (str): search term.
+
+        Returns:
+            dict: raw entity.
+        """
+        return (await self.get(url, {'search': term}))['results'][0]
+
+    async def clean(self, entity, filter_keys):
+        """Filters and cleans an entity, expanding its references through the
+        engine's resolver.
+
+        Parameters:
+            entity (dict or coroutine): raw entity or an awaitable producing one.
+            filter_keys (tuple): keys to keep.
+
+        Returns:
+            dict: cleaned entity.
+        """
+        import asyncio
+        if asyncio.iscoroutine(entity) or isinstance(entity, asyncio.Future):
+            entity = await entity
+        cleaned = await self.run(
+            lambda: clean_data(filter_data(entity, filter_keys), self.resolver))
+        return await self.expand(cleaned)
+
+    async def expand(self, value):
+        """Resolves the References inside value in batches: every handle of one
+        level is resolved concurrently, then the handles found in the entities
+        they point to, until none are left (the resolver's depth bounds the
+        levels). Handles another step resolved already are looked up again in
+        the resolver's memo so the dependency is recorded for this step too.
+
+        Parameters:
+            value: cleaned entity or document.
+
+        Returns:
+            the value, with its References resolved.
+        """
+        import asyncio
+        def settle(handle):
+            if handle.resolved:
+                if handle.resolver is not None:
+                    handle.resolver.resolve(handle.url, handle.keys)  # records the dependency
+                return
+            handle.resolve()
+
+        level = {handle.url: handle for handle in iter_references(value)}
+        seen = set()
+        while level:
+            seen.update(level)
+            pending = [handle for handle in level.values() if not handle.resolved]
+            for handle in level.values():
+                if handle.resolved:
+                    settle(handle)
+            await asyncio.gather(*(self.run(settle, handle) for handle in pending))
+            level = {handle.url: handle for parent in level.values()
+                     for handle in iter_references(parent.resolve()) if handle.url not in seen}
+        return value
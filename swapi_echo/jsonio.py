@@ -0,0 +1,163 @@
+"""Reading, streaming and writing JSON documents, and the digests used to
+fingerprint them.
+"""
+import hashlib, json
+
+from .config import STREAM_CHUNK_SIZE
+from .metrics import stage
+from .models import to_json
+
+
+def read_json(filepath):
+    """Given a valid filepath reads a JSON document and returns a dictionary.
+
+    Parameters:
+        filepath (str): path to file.
+ 
+    Returns: 
+        readjson_dict: dictionary representations of the decoded JSON document. 
+    """
+    with stage('read_json'), open(filepath, 'r', encoding='utf8') as read_obj:
+        readjson_dict = json.load(read_obj)
+    return readjson_dict
+
+
+_NUMBER_START = frozenset('-0123456789')  # first characters of a JSON number
+_NUMBER_CHARS = '0123456789+-.eE'
+
+
+def iter_json(filepath, chunk_size=STREAM_CHUNK_SIZE):
+    """Given a valid filepath yields the items of the JSON document one at a time
+    without loading the whole file: a top-level array yields its elements, any
+    other document is read as NDJSON (one JSON value per line).
+
+    Parameters:
+        filepath (str): path to file.
+        chunk_size (int): characters read per refill of the buffer.
+
+    Returns:
+        generator: decoded items, in file order.
+    """
+    decoder = json.JSONDecoder()
+    with open(filepath, 'r', encoding='utf8') as read_obj:
+        buffer = ''
+        position = 0
+        eof = False
+        in_array = None
+        separator = False  # inside the array after an element: ',' or ']' comes next
+
+        def skip():
+            nonlocal buffer, position, eof
+            while True:
+                while position < len(buffer) and buffer[position] in ' \t\r\n':
+                    position += 1
+                if position < len(buffer) or eof:
+                    return
+                buffer, position = read_obj.read(chunk_size), 0
+                eof = not buffer
+
+        while True:
+            skip()
+            if position >= len(buffer):
+                if in_array:
+                    raise ValueError(f"{filepath}: unterminated JSON array")
+                return
+            char = buffer[position]
+            if in_array is None:
+                in_array = char == '['
+                if in_array:
+                    position += 1
+                    skip()
+                    if buffer[position:position + 1] == ']':
+                        position += 1
+                        break
+                continue
+            if separator:
+                if char == ']':
+                    position += 1
+                    break
+                if char != ',':
+                    raise ValueError(f"{filepath}: expected ',' or ']' after an array element")
+                position += 1
+                separator = False
+                continue
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                    # a number running to the end of the buffer ('12' or '12.' of
+                    # '12.5') may continue in the next chunk
+                    if eof or char not in _NUMBER_START or buffer[end:].lstrip(_NUMBER_CHARS):
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                more = read_obj.read(max(chunk_size, len(buffer) - position))
+                eof = not more
+                buffer, position = buffer[position:] + more, 0
+            position = end
+            separator = in_array
+            yield item
+        skip()
+        if position < len(buffer):
+            raise ValueError(f"{filepath}: extra data after the JSON array")
+
+
+def digest(value):
+    """Returns a stable fingerprint of a JSON-serializable value.
+
+    Parameters:
+        value: JSON-serializable value.
+
+    Returns:
+        str: hex SHA-256 of the value's canonical JSON encoding.
+    """
+    encoded = _canonical_encoder.encode(value)
+    return hashlib.sha256(encoded.encode('utf8')).hexdigest()
+
+
+def file_digest(filepath):
+    """Returns a fingerprint of a file's bytes.
+
+    Parameters:
+        filepath (str): path to file.
+
+    Returns:
+        str: hex SHA-256 of the file contents.
+    """
+    sha = hashlib.sha256()
+    with open(filepath, 'rb') as read_obj:
+        for block in iter(lambda: read_obj.read(1024 * 1024), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+_encoder = json.JSONEncoder(default=to_json)  # same output as json.dumps()
+_canonical_encoder = json.JSONEncoder(sort_keys=True, separators=(',', ':'), default=to_json)
+
+
+def write_json(filepath, data, ndjson=False):
+    """ capable of writing SWAPI data to a target JSON document file. 
+        If data is an iterator (e.g., a generator) its items are written as
+        they are produced, as a JSON array byte-identical to dumping the list,
+        or as NDJSON lines when ndjson is True.
+    Parameters:
+        filepath (str) 
+        data
+        ndjson (bool): write one JSON value per line (iterators only).
+    Returns:
+        None
+    """
+    with stage('write_json'), open(filepath, 'w', encoding='utf8') as writeobj:
+        if iter(data) is not data:
+            writeobj.write(_encoder.encode(data))  # C encoder; json.dump() is pure Python
+        elif ndjson:
+            for item in data:
+                writeobj.write(_encoder.encode(item))
+                writeobj.write('\n')
+        else:
+            separator = '['
+            for item in data:
+                writeobj.write(separator)
+                writeobj.write(_encoder.encode(item))
+                separator = ', '
+            writeobj.write('[]' if separator == '[' else ']')
@@ -0,0 +1,264 @@
+"""Optional instrumentation: per-stage timings, counters and latency
+histograms, collected only while enable_metrics() is in effect.
+"""
+import bisect, contextlib, json, threading, time
+
+from .config import LATENCY_BUCKETS
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values (Prometheus style)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """Creates an empty histogram.
+
+        Parameters:
+            buckets (tuple): ascending upper bounds; an implicit +Inf bucket follows.
+
+        Returns:
+            None
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Adds one value (callers hold the owning Metrics lock)."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def report(self):
+        """Returns {'count', 'sum', 'buckets'} with cumulative counts by upper bound."""
+        cumulative, total = {}, 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        return {'count': self.count, 'sum': self.sum, 'buckets': cumulative}
+
+
+class Metrics:
+    """Run instrumentation: counters, latency histograms, exclusive wall and CPU
+    time per stage and the duration of each pipeline step. Stages nest per
+    thread and a stage is only charged for the time not spent in the stages
+    nested inside it, so the stage times of a run add up instead of overlapping.
+    Instrumentation is off unless enable_metrics() was called; while it is off
+    the stage() and count() hooks return immediately.
+    """
+
+    def __init__(self, trace=None):
+        """Creates empty metrics.
+
+        Parameters:
+            trace (function): optional hook called as trace(stage, wall, cpu)
+                each time a stage is left, with that visit's exclusive seconds.
+
+        Returns:
+            None
+        """
+        self.trace = trace
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.stages = {}  # name -> [calls, wall seconds, cpu seconds]
+        self.steps = {}  # pipeline node -> {'seconds': float, 'skipped': bool}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1):
+        """Adds value to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        """Adds an observation to a histogram."""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def step(self, name, seconds, skipped=False):
+        """Records how long a pipeline step took."""
+        with self._lock:
+            self.steps[name] = {'seconds': seconds, 'skipped': skipped}
+
+    def _charge(self, frame, wall, cpu):
+        """Adds the time since frame was last resumed to its stage."""
+        name, wall_start, cpu_start = frame
+        wall, cpu = wall - wall_start, cpu - cpu_start
+        with self._lock:
+            totals = self.stages.get(name)
+            if totals is None:
+                totals = self.stages[name] = [0, 0.0, 0.0]
+            totals[1] += wall
+            totals[2] += cpu
+        return wall, cpu
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Context manager timing the enclosed block as stage name.
+
+        Parameters:
+            name (str): stage name (e.g., 'clean').
+
+        Returns:
+            context manager
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        wall, cpu = time.perf_counter(), time.thread_time()
+        if stack:  # pause the enclosing stage
+            self._charge(stack[-1], wall, cpu)
+        stack.append([name, wall, cpu])
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter(), time.thread_time()
+            spent = self._charge(stack.pop(), wall, cpu)
+            with self._lock:
+                self.stages[name][0] += 1
+            if stack:  # resume the enclosing stage
+                stack[-1][1:] = [wall, cpu]
+            if self.trace is not None:
+                self.trace(name, *spent)
+
+    def report(self):
+        """Returns the run report.
+
+        Parameters:
+            None
+
+        Returns:
+            dict: counters, histograms, stages (calls, wall_seconds,
+                cpu_seconds), pipeline steps and the run's elapsed seconds.
+        """
+        with self._lock:
+            return {
+                'elapsed_seconds': time.time() - self.started,
+                'counters': dict(self.counters),
+                'histograms': {name: histogram.report()
+                               for name, histogram in self.histograms.items()},
+                'stages': {name: {'calls': calls, 'wall_seconds': wall, 'cpu_seconds': cpu}
+                           for name, (calls, wall, cpu) in self.stages.items()},
+                'steps': {name: dict(step) for name, step in self.steps.items()},
+            }
+
+    def prometheus(self):
+        """Returns the run report in the Prometheus text exposition format.
+
+        Parameters:
+            None
+
+        Returns:
+            str: metric lines prefixed swapi_.
+        """
+        report = self.report()
+        lines = []
+        for name, value in sorted(report['counters'].items()):
+            lines += [f"# TYPE swapi_{name}_total counter", f"swapi_{name}_total {value}"]
+        for name, histogram in sorted(report['histograms'].items()):
+            lines.append(f"# TYPE swapi_{name} histogram")
+            lines += [f'swapi_{name}_bucket{{le="{bound}"}} {count}'
+                      for bound, count in histogram['buckets'].items()]
+            lines += [f"swapi_{name}_sum {histogram['sum']}",
+                      f"swapi_{name}_count {histogram['count']}"]
+        lines.append("# TYPE swapi_stage_seconds_total counter")
+        for name, stage in sorted(report['stages'].items()):
+            lines += [f'swapi_stage_seconds_total{{stage="{name}",clock="wall"}} {stage["wall_seconds"]}',
+                      f'swapi_stage_seconds_total{{stage="{name}",clock="cpu"}} {stage["cpu_seconds"]}']
+        lines.append("# TYPE swapi_stage_calls_total counter")
+        lines += [f'swapi_stage_calls_total{{stage="{name}"}} {stage["calls"]}'
+                  for name, stage in sorted(report['stages'].items())]
+        lines.append("# TYPE swapi_step_seconds gauge")
+        lines += [f'swapi_step_seconds{{step="{name}",skipped="{str(step["skipped"]).lower()}"}} '
+                  f'{step["seconds"]}' for name, step in sorted(report['steps'].items())]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Writes the run report, as Prometheus text if path ends in .prom and
+        as JSON otherwise.
+
+        Parameters:
+            path (str): report file.
+
+        Returns:
+            None
+        """
+        with open(path, 'w', encoding='utf8') as file:
+            if path.endswith('.prom'):
+                file.write(self.prometheus())
+            else:
+                json.dump(self.report(), file, indent=2)
+
+
+_metrics = None
+_NO_STAGE = contextlib.nullcontext()
+
+
+def enable_metrics(trace=None):
+    """Turns instrumentation on for the rest of the process.
+
+    Parameters:
+        trace (function): optional per-stage hook (see Metrics).
+
+    Returns:
+        Metrics: the metrics being collected.
+    """
+    global _metrics
+    _metrics = Metrics(trace)
+    return _metrics
+
+
+def disable_metrics():
+    """Turns instrumentation off.
+
+    Parameters:
+        None
+
+    Returns:
+        Metrics: the metrics collected until now, or None.
+    """
+    global _metrics
+    metrics, _metrics = _metrics, None
+    return metrics
+
+
+def active_metrics():
+    """Returns the Metrics being collected, or None while instrumentation is off.
+
+    Parameters:
+        None
+
+    Returns:
+        Metrics: the active collector, or None.
+    """
+    return _metrics
+
+
+def stage(name):
+    """Times the enclosed block as a stage when instrumentation is on.
+
+    Parameters:
+        name (str): stage name.
+
+    Returns:
+        context manager: Metrics.stage(name), or a no-op while disabled.
+    """
+    return _NO_STAGE if _metrics is None else _metrics.stage(name)
+
+
+def count(name, value=1):
+    """Adds to a counter when instrumentation is on.
+
+    Parameters:
+        name (str): counter name (e.g., 'requests').
+        value (int): amount to add.
+
+    Returns:
+        None
+    """
+    if _metrics is not None:
+        _metrics.count(name, value)
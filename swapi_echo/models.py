@@ -0,0 +1,290 @@
+"""Cleaned entity models: slotted Records, Overlay views, lazy References
+to linked entities and their JSON serialization.
+"""
+from collections.abc import Mapping
+
+from .config import (
+    HOTH_KEYS, PEOPLE_KEYS, PEOPLE_LINKS, PLANET_LINKS, SPECIES_KEYS, SPECIES_LINKS,
+    STARSHIP_KEYS, STARSHIP_LINKS, VEHICLE_KEYS, VEHICLE_LINKS,
+)
+
+
+class Record(Mapping):
+    """Base of the slotted entity models. A record stores each of its model's
+    fields in a slot instead of a per-record dict, so the key strings are held
+    once per model rather than once per record. Records are read-only mappings
+    (entity['name'], entity.get('mass'), 'homeworld' in entity) that iterate
+    their set fields in model order, so they serialize exactly like the dicts
+    they replace; copy() returns such a dict for callers that edit the copy.
+    """
+    __slots__ = ()
+    _fields = ()  # field names in output order, set by entity_model()
+    _field_set = frozenset()
+
+    def __init__(self, **values):
+        for key, value in values.items():
+            setattr(self, key, value)
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:  # field left unset
+                pass
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._field_set and hasattr(self, key)
+
+    def __iter__(self):
+        for key in self._fields:
+            if hasattr(self, key):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self):
+        """Returns the set fields as a dict, in model order (nested records are
+        kept as they are).
+        """
+        return {key: getattr(self, key) for key in self}
+
+    def copy(self):
+        """Returns a shallow copy of the record as a plain, mutable dict, so
+        callers that copied the cleaned dict to edit it keep working.
+        """
+        return self.to_dict()
+
+
+def entity_model(name, keys):
+    """Generates a slotted Record subclass with one field per key. Models used
+    with clean_parallel() must be bound to a module-level name equal to name so
+    worker processes can unpickle their records.
+
+    Parameters:
+        name (str): class name (e.g., 'Person').
+        keys (tuple): field names in output order (e.g., PEOPLE_KEYS).
+
+    Returns:
+        type: the model class.
+    """
+    return type(name, (Record,), {'__slots__': tuple(keys), '_fields': tuple(keys),
+                                  '_field_set': frozenset(keys), '__module__': __name__})
+
+
+Person = entity_model('Person', PEOPLE_KEYS + PEOPLE_LINKS)
+Planet = entity_model('Planet', HOTH_KEYS + PLANET_LINKS)
+Starship = entity_model('Starship', STARSHIP_KEYS + STARSHIP_LINKS)
+Species = entity_model('Species', SPECIES_KEYS + SPECIES_LINKS)
+Vehicle = entity_model('Vehicle', VEHICLE_KEYS + VEHICLE_LINKS)
+
+
+class Overlay(Mapping):
+    """Read-only view of an entity with some keys replaced or added, used where
+    a modified copy was made before (e.g., a starship with its crew assigned).
+    Replaced keys keep their position and added keys follow the entity's own,
+    as with combine_data(), but the entity itself is shared rather than copied.
+    """
+    __slots__ = ('base', 'changes')
+
+    def __init__(self, base, changes):
+        """Creates the view.
+
+        Parameters:
+            base (Mapping): entity to show.
+            changes (dict): keys to replace or add.
+
+        Returns:
+            None
+        """
+        self.base = base
+        self.changes = changes
+
+    def __getitem__(self, key):
+        if key in self.changes:
+            return self.changes[key]
+        return self.base[key]
+
+    def __contains__(self, key):
+        return key in self.changes or key in self.base
+
+    def __iter__(self):
+        yield from self.base
+        for key in self.changes:
+            if key not in self.base:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Overlay({self.to_dict()!r})"
+
+    def to_dict(self):
+        """Returns the view as a plain dict (nested values are kept as they are)."""
+        combined = dict(self.base)
+        combined.update(self.changes)
+        return combined
+
+    def copy(self):
+        """Returns a shallow copy of the view as a plain, mutable dict."""
+        return self.to_dict()
+
+
+def to_json(value):
+    """json default hook serializing records and overlays as the dicts they
+    stand in for and References as the entities they point to.
+
+    Parameters:
+        value: object the json module cannot encode by itself.
+
+    Returns:
+        dict: the value as a dict.
+    """
+    if isinstance(value, (Record, Overlay)):
+        return value.to_dict()
+    if isinstance(value, Reference):
+        return value.resolve()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def share_references(entities, pool=None):
+    """Makes entities whose homeworld or species references name the same url
+    share one copy of the referenced record (e.g., after records were cleaned
+    in separate processes, each with its own copies).
+
+    Parameters:
+        entities (list): cleaned entities, updated in place.
+        pool (dict): url -> shared record; defaults to a new pool.
+
+    Returns:
+        list: the entities.
+    """
+    if pool is None:
+        pool = {}
+
+    def shared(reference):
+        if isinstance(reference, Reference):
+            return pool.setdefault(reference.url, reference)
+        if isinstance(reference, Mapping) and 'url' in reference:
+            return pool.setdefault(reference['url'], reference)
+        return reference
+
+    for entity in entities:
+        if isinstance(entity, Record):
+            if 'homeworld' in entity:
+                entity.homeworld = shared(entity.homeworld)
+            if 'species' in entity and isinstance(entity.species, list):
+                entity.species = [shared(reference) for reference in entity.species]
+    return entities
+
+
+_UNRESOLVED = object()
+
+
+class Reference(Mapping):
+    """Lazy handle for a linked SWAPI entity (e.g., a person's homeworld). The
+    entity is fetched and cleaned through the resolver the first time it is
+    needed: on item access, on serialization (see to_json()) or when
+    AsyncEngine.expand() resolves every pending handle of a value together.
+    Handles compare and hash by url, without resolving. Pickling keeps the
+    entity only if it has already been resolved; an unresolved handle unpickles
+    without its resolver and resolves through get_resolver() unless one is
+    attached again (as clean_parallel() does).
+    """
+    __slots__ = ('url', 'keys', 'resolver', '_value')
+
+    def __init__(self, url, keys, resolver, value=_UNRESOLVED):
+        """Creates a handle.
+
+        Parameters:
+            url (str): linked entity url.
+            keys (tuple): filter keys the entity is cleaned with.
+            resolver (Resolver): resolver fetching the entity.
+            value (Mapping): the entity, if already resolved.
+
+        Returns:
+            None
+        """
+        self.url = url
+        self.keys = keys
+        self.resolver = resolver
+        self._value = value
+
+    @property
+    def resolved(self):
+        """True once the entity has been fetched."""
+        return self._value is not _UNRESOLVED
+
+    def resolve(self):
+        """Returns the cleaned entity, resolving it on first use.
+
+        Parameters:
+            None
+
+        Returns:
+            Mapping: cleaned entity, shared with every handle of the url.
+        """
+        if self._value is _UNRESOLVED:
+            resolver = self.resolver
+            if resolver is None:
+                from .clean import get_resolver  # clean imports this module
+                resolver = get_resolver()
+            self._value = resolver.resolve(self.url, self.keys)
+        return self._value
+
+    def __getitem__(self, key):
+        return self.resolve()[key]
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __len__(self):
+        return len(self.resolve())
+
+    def __repr__(self):
+        state = repr(self._value) if self.resolved else 'unresolved'
+        return f"Reference({self.url!r}, {state})"
+
+    def __eq__(self, other):
+        if isinstance(other, Reference):
+            return self.url == other.url
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.url)
+
+    def __reduce__(self):
+        if self.resolved:
+            return (Reference, (self.url, self.keys, None, self._value))
+        return (Reference, (self.url, self.keys, None))
+
+
+def iter_references(value):
+    """Yields the References inside a cleaned value without resolving them
+    or looking inside them.
+
+    Parameters:
+        value: cleaned entity, list or document.
+
+    Returns:
+        generator: References, possibly repeated.
+    """
+    if isinstance(value, Reference):
+        yield value
+    elif isinstance(value, Overlay):
+        yield from iter_references(value.base)
+        yield from iter_references(value.changes)
+    elif isinstance(value, Record):
+        for key in value:
+            yield from iter_references(getattr(value, key))
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_references(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from iter_references(item)
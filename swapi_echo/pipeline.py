@@ -0,0 +1,274 @@
+"""Incremental build pipeline: nodes whose outputs are reused while their
+inputs and the resources they read are unchanged, and the saved build state.
+"""
+import logging, os, time
+
+from .config import (
+    ECHO_BASE_ASSETS, ECHO_BASE_CREWS, ECHO_BASE_PEOPLE, ECHO_BASE_SEARCHES,
+    EVACUATION_ESCORTS, EVACUATION_PASSENGERS, EVACUATION_TRANSPORT, EXPANSION_DEPTH,
+    EXPANSION_POLICY, PIPELINE_STATE_PATH, PIPELINE_STATE_VERSION, dict_props, float_props,
+    int_props, list_props,
+)
+from .metrics import active_metrics
+from .jsonio import digest, file_digest, read_json
+from .clean import SCHEMAS, _dependencies
+
+log = logging.getLogger(__name__)
+
+
+def get_path(document, path):
+    """Returns the value found by following a path of keys/indexes.
+
+    Parameters:
+        document (dict): nested document.
+        path (tuple): keys and list indexes (e.g., ('garrison', 'commander')).
+
+    Returns:
+        object: the value at path.
+    """
+    for step in path:
+        document = document[step]
+    return document
+
+
+def set_path(document, path, value):
+    """Replaces the value found by following a path of keys/indexes.
+
+    Parameters:
+        document (dict): nested document (modified in place).
+        path (tuple): keys and list indexes; must not be empty.
+        value: new value.
+
+    Returns:
+        None
+    """
+    get_path(document, path[:-1])[path[-1]] = value
+
+
+class Node:
+    """A named step of a pipeline: func is called (or awaited, if it is a
+    coroutine function) with the outputs of the input nodes, in order.
+    """
+
+    def __init__(self, name, func, inputs=(), always=False):
+        """Declares a node.
+
+        Parameters:
+            name (str): unique node name.
+            func (function): computes the node output from its inputs.
+            inputs (tuple): names of the nodes whose outputs func receives.
+            always (bool): run even if the inputs are unchanged (e.g., sources
+                that read files or the network).
+
+        Returns:
+            None
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.always = always or not inputs
+
+
+class Pipeline:
+    """Dependency graph of nodes. run() starts every node needed by the
+    targets at once and each node waits only for its own inputs, so the run
+    takes as long as the critical path. A node whose inputs fingerprint the
+    same as in the previous run, and whose recorded resource dependencies are
+    unchanged, reuses its previous output instead of running.
+    """
+
+    def __init__(self, state=None, salt='', revalidate=None):
+        """Creates an empty pipeline.
+
+        Parameters:
+            state (dict): {node: {'fingerprint': str, 'digest': str, 'output': value,
+                'dependencies': dict}} from a previous run; updated in place.
+            salt (str): mixed into every fingerprint (e.g., schema_fingerprint()),
+                so a change to it re-runs every node.
+            revalidate (function): coroutine function returning the current
+                digest of a resource a node recorded with record_dependency();
+                without it such nodes always re-run.
+
+        Returns:
+            None
+        """
+        self.nodes = {}
+        self.state = state if state is not None else {}
+        self.salt = salt
+        self.revalidate = revalidate
+        self.ran = []
+        self.skipped = []
+
+    def add(self, name, func, inputs=(), always=False):
+        """Adds a node (see Node).
+
+        Parameters:
+            name (str): unique node name.
+            func (function): computes the node output.
+            inputs (tuple): input node names.
+            always (bool): never skip this node.
+
+        Returns:
+            Node: the new node.
+        """
+        if name in self.nodes:
+            raise ValueError(f"duplicate pipeline node {name!r}")
+        node = self.nodes[name] = Node(name, func, inputs, always)
+        return node
+
+    def requires(self, targets):
+        """Returns the targets and every node they depend on.
+
+        Parameters:
+            targets (list): node names.
+
+        Returns:
+            set: node names.
+        """
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                if name not in self.nodes:
+                    raise KeyError(f"unknown pipeline node {name!r}")
+                needed.add(name)
+                pending.extend(self.nodes[name].inputs)
+        return needed
+
+    async def run(self, targets=None):
+        """Builds the targets.
+
+        Parameters:
+            targets (list): node names to build; None builds every node.
+
+        Returns:
+            dict: output of every node that was needed, by name.
+        """
+        import asyncio
+        needed = self.requires(targets if targets is not None else list(self.nodes))
+        tasks = {}
+
+        async def unchanged(dependencies):
+            if not dependencies:
+                return True
+            if self.revalidate is None:
+                return False
+            current = await asyncio.gather(*(self.revalidate(key) for key in dependencies))
+            return list(dependencies.values()) == current
+
+        async def build(node):
+            inputs = [await tasks[name] for name in node.inputs]
+            fingerprint = digest([self.salt, node.name] + [input_digest for _, input_digest in inputs])
+            previous = self.state.get(node.name)
+            if (not node.always and previous and previous['fingerprint'] == fingerprint
+                    and await unchanged(previous.get('dependencies'))):
+                self.skipped.append(node.name)
+                if active_metrics() is not None:
+                    active_metrics().step(node.name, 0.0, skipped=True)
+                return previous['output']
+            dependencies = {}
+            token = _dependencies.set(dependencies)
+            start = time.perf_counter()
+            try:
+                output = node.func(*(value for value, _ in inputs)) if inputs else node.func()
+                if asyncio.iscoroutine(output):
+                    output = await output
+            finally:
+                _dependencies.reset(token)
+            metrics = active_metrics()
+            if metrics is not None:
+                metrics.step(node.name, time.perf_counter() - start)
+            self.state[node.name] = {'fingerprint': fingerprint, 'digest': digest(output),
+                                     'output': output, 'dependencies': dependencies}
+            self.ran.append(node.name)
+            return output
+
+        async def build_pair(node):
+            output = await build(node)
+            return output, self.state[node.name]['digest']
+
+        for name in needed:
+            tasks[name] = asyncio.ensure_future(build_pair(self.nodes[name]))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        log.debug("pipeline ran %d nodes, reused %d", len(self.ran), len(self.skipped))
+        return {name: task.result()[0] for name, task in tasks.items()}
+
+
+def read_pipeline_state(state_path=PIPELINE_STATE_PATH):
+    """Reads the state saved by the previous build: pipeline node outputs and
+    the fingerprints of the output files written.
+
+    Parameters:
+        state_path (str): state file; missing, unreadable or outdated files
+            give an empty state.
+
+    Returns:
+        dict: {'version': int, 'nodes': dict, 'outputs': dict}.
+    """
+    try:
+        state = read_json(state_path)
+    except (OSError, ValueError):
+        state = None
+    if not isinstance(state, dict) or state.get('version') != PIPELINE_STATE_VERSION:
+        state = {'version': PIPELINE_STATE_VERSION}
+    state.setdefault('nodes', {})
+    state.setdefault('outputs', {})
+    return state
+
+
+def schema_fingerprint():
+    """Fingerprints the code-level inputs of a build: the registered cleaning
+    schemas, the prop tuples and the Echo Base configuration.
+
+    Parameters:
+        None
+
+    Returns:
+        str: digest of the schemas and configuration.
+    """
+    return digest({
+        'schemas': [[schema.name, schema.marker, list(schema.keys)] for schema in SCHEMAS],
+        'props': [int_props, float_props, list_props, dict_props],
+        'references': [EXPANSION_POLICY, EXPANSION_DEPTH],
+        'echo_base': [ECHO_BASE_SEARCHES, ECHO_BASE_PEOPLE,
+                      {name: [list(path), lookup, list(keys)]
+                       for name, (path, lookup, keys) in ECHO_BASE_ASSETS.items()},
+                      ECHO_BASE_CREWS, EVACUATION_TRANSPORT, EVACUATION_PASSENGERS,
+                      EVACUATION_ESCORTS],
+    })
+
+
+def output_current(outputs, filepath, fingerprint):
+    """Tells whether an output file was written from inputs with this
+    fingerprint and is still on disk unmodified.
+
+    Parameters:
+        outputs (dict): 'outputs' section of the build state.
+        filepath (str): output file.
+        fingerprint (str): fingerprint of the inputs it would be built from.
+
+    Returns:
+        bool: True if the file can be kept as is.
+    """
+    previous = outputs.get(filepath)
+    return (previous is not None and previous['fingerprint'] == fingerprint
+            and os.path.exists(filepath) and file_digest(filepath) == previous['file'])
+
+
+def record_output(outputs, filepath, fingerprint):
+    """Remembers the fingerprint an output file was written from.
+
+    Parameters:
+        outputs (dict): 'outputs' section of the build state.
+        filepath (str): output file just written.
+        fingerprint (str): fingerprint of its inputs.
+
+    Returns:
+        None
+    """
+    outputs[filepath] = {'fingerprint': fingerprint, 'file': file_digest(filepath)}
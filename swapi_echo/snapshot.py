@@ -0,0 +1,221 @@
+"""Local SWAPI data: the EntityStore answering requests from a crawled
+snapshot, and loading snapshots into it.
+"""
+import bisect
+
+from .config import SEARCH_FIELDS, SNAPSHOT_PATH, SNAPSHOT_VERSION
+from .jsonio import read_json
+from .cache import resource_path
+
+
+class EntityStore:
+    """In-memory store of SWAPI entities answering get_swapi_resource-style
+    requests without the network. Entities are indexed by resource path (the
+    part of the url after /api/, so hosts need not match), by exact and
+    case-folded name, by a sorted name list for prefix queries and by a trigram
+    index for ?search= substring queries, which follow SWAPI's rules: every
+    whitespace-separated term must appear, case-insensitively, in one of the
+    collection's search fields.
+    """
+
+    def __init__(self, fallback=None):
+        """Creates an empty store.
+
+        Parameters:
+            fallback (function): called as fallback(url, params) for requests the
+                store cannot answer; None raises KeyError instead.
+
+        Returns:
+            None
+        """
+        self.fallback = fallback
+        self.collections = {}
+        self._by_path = {}
+        self._by_name = {}
+        self._by_casefold = {}
+        self._names = {}  # kind -> sorted [(casefolded name, position)]
+        self._trigrams = {}  # (kind, trigram) -> set of positions
+
+    def add(self, entity, kind=None):
+        """Adds (or replaces) an entity and indexes it.
+
+        Parameters:
+            entity (dict): raw SWAPI entity; must carry its 'url'.
+            kind (str): collection name; defaults to the type named by the url.
+
+        Returns:
+            None
+        """
+        path = resource_path(entity['url'])
+        if kind is None:
+            kind = path.split('/')[0]
+        entities = self.collections.setdefault(kind, [])
+        previous = self._by_path.get(path)
+        if previous is not None and previous in entities:
+            position = entities.index(previous)
+            entities[position] = entity
+        else:
+            position = len(entities)
+            entities.append(entity)
+        self._by_path[path] = entity
+
+        name = entity.get('name', entity.get('title'))
+        if name is not None:
+            self._by_name[(kind, name)] = entity
+            self._by_casefold.setdefault((kind, name.casefold()), entity)
+            self._names.pop(kind, None)  # rebuilt lazily by with_prefix()
+        for field in SEARCH_FIELDS.get(kind, ('name',)):
+            value = str(entity.get(field, '')).casefold()
+            for start in range(len(value) - 2):
+                self._trigrams.setdefault((kind, value[start:start + 3]), set()).add(position)
+
+    def load(self, entities, kind=None):
+        """Adds every entity of a list (e.g., the contents of swapi_planets-v1p0.json).
+
+        Parameters:
+            entities (list): raw SWAPI entities.
+            kind (str): collection name; defaults to each entity's url type.
+
+        Returns:
+            EntityStore: this store, for chaining.
+        """
+        if kind is not None:
+            self.collections.setdefault(kind, [])  # an empty collection still exists
+        for entity in entities:
+            self.add(entity, kind)
+        return self
+
+    def by_url(self, url):
+        """Returns the entity at url, or None.
+
+        Parameters:
+            url (str): resource url from any SWAPI host.
+
+        Returns:
+            dict: raw entity.
+        """
+        return self._by_path.get(resource_path(url))
+
+    def by_name(self, kind, name, exact=False):
+        """Returns the entity of a collection with the given name, or None.
+
+        Parameters:
+            kind (str): collection name (e.g., 'people').
+            name (str): entity name (or title for films).
+            exact (bool): if False (default) the match ignores case.
+
+        Returns:
+            dict: raw entity.
+        """
+        if exact:
+            return self._by_name.get((kind, name))
+        return self._by_casefold.get((kind, name.strip().casefold()))
+
+    def with_prefix(self, kind, prefix):
+        """Returns the entities of a collection whose name starts with prefix,
+        ignoring case, in name order.
+
+        Parameters:
+            kind (str): collection name.
+            prefix (str): name prefix.
+
+        Returns:
+            list: raw entities.
+        """
+        names = self._names.get(kind)
+        if names is None:
+            names = sorted((str(entity.get('name', entity.get('title', ''))).casefold(), position)
+                           for position, entity in enumerate(self.collections.get(kind, ())))
+            self._names[kind] = names
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(names, (prefix,))
+        found = []
+        for name, position in names[start:]:
+            if not name.startswith(prefix):
+                break
+            found.append(self.collections[kind][position])
+        return found
+
+    def search(self, kind, term):
+        """Returns the entities of a collection matching a SWAPI search term, in
+        collection order. Terms of three or more characters are narrowed down
+        through the trigram index before being checked.
+
+        Parameters:
+            kind (str): collection name.
+            term (str): search term (e.g., 't-65 x-wing').
+
+        Returns:
+            list: raw entities.
+        """
+        entities = self.collections.get(kind, [])
+        terms = str(term).casefold().replace(',', ' ').split()
+        candidates = None
+        for word in terms:
+            if len(word) < 3:
+                continue
+            for start in range(len(word) - 2):
+                postings = self._trigrams.get((kind, word[start:start + 3]), set())
+                candidates = postings if candidates is None else candidates & postings
+        positions = range(len(entities)) if candidates is None else sorted(candidates)
+        fields = SEARCH_FIELDS.get(kind, ('name',))
+        return [entities[position] for position in positions
+                if all(any(word in str(entities[position].get(field, '')).casefold()
+                           for field in fields)
+                       for word in terms)]
+
+    def get(self, url, params=None):
+        """Returns the resource or search result SWAPI would return for url.
+
+        Parameters:
+            url (str): resource or collection url.
+            params (dict): optional query parameters; only 'search' is honoured.
+
+        Returns:
+            dict: the entity, or a single-page result set for collection urls.
+        """
+        path = resource_path(url)
+        if path in self._by_path:
+            return self._by_path[path]
+        if path in self.collections:
+            results = self.search(path, (params or {}).get('search', ''))
+            return {'count': len(results), 'next': None, 'previous': None,
+                    'results': results}
+        if self.fallback is not None:
+            return self.fallback(url, params)
+        raise KeyError(f"{url} is not in the entity store")
+
+
+def load_snapshot(snapshot_path=SNAPSHOT_PATH, fallback=None):
+    """Reads a crawled snapshot into an entity store for offline use.
+
+    Parameters:
+        snapshot_path (str): snapshot file written by crawl_swapi().
+        fallback (function): optional fetch for requests the snapshot cannot answer.
+
+    Returns:
+        EntityStore: store to pass to AsyncEngine as its source.
+    """
+    snapshot = read_json(snapshot_path)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {snapshot.get('version')}")
+    store = EntityStore(fallback)
+    for kind, entities in snapshot['collections'].items():
+        store.load(entities, kind)
+    return store
+
+
+def load_entities(filepath, store=None):
+    """Reads a JSON list of SWAPI entities (e.g., swapi_planets-v1p0.json) into
+    an entity store.
+
+    Parameters:
+        filepath (str): path to file.
+        store (EntityStore): store to add to; defaults to a new store.
+
+    Returns:
+        EntityStore: the store holding the entities.
+    """
+    if store is None:
+        store = EntityStore()
+    return store.load(read_json(filepath))
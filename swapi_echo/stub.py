@@ -0,0 +1,235 @@
+"""StubServer: a local SWAPI stand-in for offline, reproducible runs, with
+injectable latency, errors and rate limiting.
+"""
+import json, logging, os, random, threading, time
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from .config import ENDPOINT, FIXTURES_PATH, SNAPSHOT_VERSION, STUB_PAGE_SIZE
+from .jsonio import read_json
+from .cache import resource_path
+from .snapshot import EntityStore
+
+log = logging.getLogger(__name__)
+
+
+class StubServer:
+    """Local stand-in for SWAPI serving resources, ?search= and paginated
+    collections from a snapshot (by default the bundled FIXTURES_PATH), so the
+    build, the crawler and the client's retry logic can be exercised offline and
+    reproducibly. Entities are served as stored, so their urls still name
+    ENDPOINT; point a client at the stub with SwapiClient(endpoint_alias=stub.url)
+    or the SWAPI_ENDPOINT_ALIAS environment variable. Latency, server errors and
+    rate limiting can be injected; errors are drawn from a seeded generator so
+    runs with the same settings fail the same number of times.
+    """
+
+    def __init__(self, snapshot_path=FIXTURES_PATH, host='127.0.0.1', port=0,
+                 latency=0.0, error_rate=0.0, rate_limit=None,
+                 page_size=STUB_PAGE_SIZE, seed=0):
+        """Creates a stopped server.
+
+        Parameters:
+            snapshot_path (str): snapshot file (crawl_swapi() format) to serve.
+            host (str): interface to listen on.
+            port (int): port to listen on; 0 picks a free one.
+            latency (float): seconds added to every response.
+            error_rate (float): fraction of requests answered with 500.
+            rate_limit (int): requests allowed per second; the rest get 429
+                with Retry-After. None disables the limit.
+            page_size (int): results per collection page.
+            seed (int): seed of the error generator.
+
+        Returns:
+            None
+        """
+        from http.server import ThreadingHTTPServer
+        snapshot = read_json(snapshot_path)
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {snapshot.get('version')}")
+        self.store = EntityStore()
+        for kind, entities in snapshot['collections'].items():
+            self.store.load(entities, kind)
+        self.endpoint = snapshot.get('endpoint', ENDPOINT).rstrip('/')
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.page_size = page_size
+        self._random = random.Random(seed)
+        self._window = (0, 0)  # (second, requests started in it)
+        self._counts = {'requests': 0, 'errors': 0, 'throttled': 0, 'not_found': 0}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        """Root url of the stub, standing in for ENDPOINT (e.g., 'http://127.0.0.1:8765/api')."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def _handler(self):
+        """Returns the request handler class bound to this server."""
+        from http.server import BaseHTTPRequestHandler
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, body, headers = stub.respond(self.path)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _inject(self):
+        """Decides whether the current request fails, updating the counters.
+
+        Returns:
+            tuple: (status, headers) of an injected failure, or None.
+        """
+        with self._lock:
+            self._counts['requests'] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                second, started = self._window
+                if int(now) != second:
+                    second, started = int(now), 0
+                self._window = (second, started + 1)
+                if started >= self.rate_limit:
+                    self._counts['throttled'] += 1
+                    return 429, {'Retry-After': f"{second + 1 - now:.3f}"}
+            if self.error_rate and self._random.random() < self.error_rate:
+                self._counts['errors'] += 1
+                return 500, {}
+        return None
+
+    def respond(self, path):
+        """Answers one GET request the way SWAPI would.
+
+        Parameters:
+            path (str): request path and query (e.g., '/api/people/?search=luke').
+
+        Returns:
+            tuple: (status, JSON body, extra headers).
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        failure = self._inject()
+        if failure is not None:
+            status, headers = failure
+            return status, {'detail': 'Injected failure'}, headers
+
+        parts = urlsplit(path)
+        query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        resource = resource_path(parts.path)
+        if resource in self.store._by_path:
+            return 200, self.store._by_path[resource], {}
+        if resource not in self.store.collections:
+            with self._lock:
+                self._counts['not_found'] += 1
+            return 404, {'detail': 'Not found'}, {}
+
+        results = self.store.search(resource, query.get('search', ''))
+        try:
+            page = int(query.get('page', 1))
+        except ValueError:
+            page = 0
+        if page < 1 or (page - 1) * self.page_size >= max(len(results), 1):
+            with self._lock:
+                self._counts['not_found'] += 1
+            return 404, {'detail': 'Invalid page.'}, {}
+
+        def page_url(number):
+            link = {name: value for name, value in query.items() if name != 'page'}
+            link['page'] = number
+            return f"{self.endpoint}/{resource}/?{urlencode(link)}"
+
+        start = (page - 1) * self.page_size
+        return 200, {'count': len(results),
+                     'next': page_url(page + 1) if start + self.page_size < len(results) else None,
+                     'previous': page_url(page - 1) if page > 1 else None,
+                     'results': results[start:start + self.page_size]}, {}
+
+    def start(self):
+        """Starts serving on a background thread.
+
+        Parameters:
+            None
+
+        Returns:
+            StubServer: this server, for chaining.
+        """
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and releases the port.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stats(self):
+        """Reports the requests served and the failures injected.
+
+        Parameters:
+            None
+
+        Returns:
+            dict: requests, errors (500), throttled (429) and not_found (404) counts.
+        """
+        with self._lock:
+            return dict(self._counts)
+
+
+def serve(port=8765):
+    """Runs a StubServer in the foreground until interrupted. The
+    SWAPI_STUB_LATENCY, SWAPI_STUB_ERROR_RATE and SWAPI_STUB_RATE_LIMIT
+    environment variables inject latency (seconds), errors (a fraction) and a
+    rate limit (requests per second).
+
+    Parameters:
+        port (int): port to listen on.
+
+    Returns:
+        None
+    """
+    rate_limit = os.environ.get('SWAPI_STUB_RATE_LIMIT')
+    stub = StubServer(os.environ.get('SWAPI_STUB_SNAPSHOT', FIXTURES_PATH), port=port,
+                      latency=float(os.environ.get('SWAPI_STUB_LATENCY', 0)),
+                      error_rate=float(os.environ.get('SWAPI_STUB_ERROR_RATE', 0)),
+                      rate_limit=int(rate_limit) if rate_limit else None)
+    log.info("serving SWAPI stand-in at %s (set SWAPI_ENDPOINT_ALIAS=%s)", stub.url, stub.url)
+    try:
+        stub.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.httpd.server_close()
+        log.info("stub %s", stub.stats())
@@ -0,0 +1,54 @@
+"""iter_json must yield exactly what json.load reads, whatever the chunk size."""
+import json
+
+import pytest
+
+import swapi_echo as swapi
+
+DOCUMENTS = [
+    [],
+    [1, -2, 3.25, -0.5, 1.5e10, 2E-3, 123456789.25, 0, -1e-7],
+    [{'name': 'Hoth', 'population': None, 'diameter': 7200.5, 'gravity': [1.1, '1 standard']},
+     [[1, 2.5e3], {'a': {'b': [True, False, None]}}], 'text, with ] and [', -12.75e+2],
+    [{'url': f'https://swapi.co/api/planets/{n}/', 'orbital_period': n * 1.25e2} for n in range(40)],
+]
+
+
+def write(tmp_path, text):
+    path = tmp_path / 'document.json'
+    path.write_text(text, encoding='utf8')
+    return str(path)
+
+
+@pytest.mark.parametrize('document', DOCUMENTS)
+@pytest.mark.parametrize('separators', [(',', ':'), (', ', ': '), (' ,\n ', ' :\t')])
+def test_matches_json_load_for_every_chunk_size(tmp_path, document, separators):
+    text = json.dumps(document, separators=separators)
+    path = write(tmp_path, text)
+    with open(path, encoding='utf8') as file:
+        expected = json.load(file)
+    for chunk_size in range(1, min(len(text), 64) + 1):
+        assert list(swapi.iter_json(path, chunk_size=chunk_size)) == expected, chunk_size
+
+
+@pytest.mark.parametrize('number', ['123456789.25', '1.5e10', '-7.125E-3'])
+def test_number_split_at_default_chunk_boundary(tmp_path, number):
+    # put the number's '.' or 'e' at the last character of the first chunk
+    split = min(i for i, char in enumerate(number) if char in '.eE')
+    padding = ' ' * (swapi.STREAM_CHUNK_SIZE - 1 - split - 1)
+    path = write(tmp_path, f'[{padding}{number}, 1]')
+    assert list(swapi.iter_json(path)) == [json.loads(number), 1]
+
+
+def test_ndjson(tmp_path):
+    path = write(tmp_path, '{"a": 1}\n[2.5, 3]\n4e2\n')
+    for chunk_size in range(1, 8):
+        assert list(swapi.iter_json(path, chunk_size=chunk_size)) == [{'a': 1}, [2.5, 3], 400.0]
+
+
+@pytest.mark.parametrize('text', ['[1,,2]', '[1 2]', '[,1]', '[1,]', '[1,2', '[1] 2', '[1;2]'])
+def test_rejects_malformed_arrays(tmp_path, text):
+    path = write(tmp_path, text)
+    for chunk_size in (1, 2, 64):
+        with pytest.raises(ValueError):
+            list(swapi.iter_json(path, chunk_size=chunk_size))
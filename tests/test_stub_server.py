@@ -0,0 +1,123 @@
+"""SwapiClient retries, circuit breaker and record/replay, driven against a StubServer."""
+import os, time
+
+import pytest
+
+import swapi_echo as swapi
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        swapi.FIXTURES_PATH)
+LUKE = swapi.ENDPOINT + '/people/1/'
+
+
+@pytest.fixture
+def stub():
+    with swapi.StubServer(FIXTURES) as server:
+        yield server
+
+
+def client_for(stub, **options):
+    options.setdefault('rate_limit', None)
+    options.setdefault('backoff_base', 0.0)
+    return swapi.SwapiClient(endpoint_alias=stub.url, **options)
+
+
+def test_serves_fixtures_through_endpoint_alias(stub):
+    client = client_for(stub)
+    response, data = client.fetch(LUKE)
+    assert response.status_code == 200
+    assert data['name'] == 'Luke Skywalker'
+    _, page = client.fetch(swapi.ENDPOINT + '/planets/', {'search': 'hoth'})
+    assert [planet['name'] for planet in page['results']] == ['Hoth']
+    assert stub.stats()['requests'] == 2
+    client.close()
+
+
+def test_429_waits_for_retry_after(stub):
+    stub.rate_limit = 2
+    # no backoff of its own and one retry: only waiting out Retry-After can succeed
+    client = client_for(stub, max_retries=1)
+    while time.monotonic() % 1 > 0.5:  # keep the burst inside one rate-limit window
+        time.sleep(0.05)
+    for number in (1, 2, 3):
+        _, data = client.fetch(f"{swapi.ENDPOINT}/people/{number}/")
+        assert data['url'] == f"{swapi.ENDPOINT}/people/{number}/"
+    assert stub.stats()['throttled'] == 1
+    assert client.stats() == {'requests': 4, 'retries': 1, 'circuit_open': False}
+    client.close()
+
+
+def test_retries_are_exhausted_without_opening_the_breaker(stub):
+    stub.error_rate = 1.0
+    client = client_for(stub, max_retries=3, breaker_threshold=2)
+    with pytest.raises(swapi.SwapiError, match='after 4 attempts'):
+        client.fetch(LUKE)
+    assert stub.stats()['errors'] == 4
+    assert client.stats()['circuit_open'] is False
+    client.close()
+
+
+def test_breaker_opens_and_closes(stub):
+    stub.error_rate = 1.0
+    client = client_for(stub, max_retries=0, breaker_threshold=2, breaker_cooldown=0.2)
+    for _ in range(2):
+        with pytest.raises(swapi.SwapiError) as failure:
+            client.fetch(LUKE)
+        assert not isinstance(failure.value, swapi.CircuitOpenError)
+    assert client.stats()['circuit_open'] is True
+
+    served = stub.stats()['requests']
+    with pytest.raises(swapi.CircuitOpenError):
+        client.fetch(LUKE)
+    assert stub.stats()['requests'] == served  # rejected without a request
+
+    stub.error_rate = 0.0
+    time.sleep(0.25)
+    _, data = client.fetch(LUKE)  # half-open trial succeeds and closes the circuit
+    assert data['name'] == 'Luke Skywalker'
+    assert client.stats()['circuit_open'] is False
+    client.close()
+
+
+REQUESTS = [(LUKE, None), (swapi.ENDPOINT + '/people/', {'search': 'Luke'}),
+            (swapi.ENDPOINT + '/planets/', {'page': 2})]
+
+
+def test_record_then_replay_offline(stub, tmp_path):
+    path = str(tmp_path / 'recording.json')
+    recorder = swapi.RecordingClient(client_for(stub), path)
+    recorded = [swapi.get_swapi_resource(url, params, swapi.ResponseCache(':memory:'), recorder)
+                for url, params in REQUESTS]
+    recorder.close()
+    served = stub.stats()['requests']
+
+    replay = swapi.ReplayClient(path)
+    replayed = [swapi.get_swapi_resource(url, params, swapi.ResponseCache(':memory:'), replay)
+                for url, params in REQUESTS]
+    assert replayed == recorded
+    assert stub.stats()['requests'] == served  # the replay never reached the stub
+    assert replay.stats() == {'requests': 3, 'misses': 0, 'recorded': 3}
+    with pytest.raises(swapi.SwapiError, match='not in the recording'):
+        replay.fetch(swapi.ENDPOINT + '/people/2/')
+
+
+def test_record_on_a_warm_cache_then_replay_without_it(stub, tmp_path):
+    path = str(tmp_path / 'recording.json')
+    cache = swapi.ResponseCache(str(tmp_path / 'cache.sqlite3'))
+    client = client_for(stub)
+    fresh = [swapi.get_swapi_resource(url, params, cache, client) for url, params in REQUESTS]
+    assert cache.stats()['entries'] == 3
+
+    recorder = swapi.RecordingClient(client, path)
+    for url, params in REQUESTS:  # cache hits too must reach the recording
+        swapi.get_swapi_resource(url, params, cache, recorder)
+    recorder.close()
+    assert recorder.stats()['recorded'] == 3
+    assert cache.stats()['hits'] == 0
+
+    empty = swapi.ResponseCache(':memory:')
+    replay = swapi.ReplayClient(path)
+    assert [swapi.get_swapi_resource(url, params, empty, replay)
+            for url, params in REQUESTS] == fresh
+    assert empty.stats()['entries'] == 0 and empty.stats()['misses'] == 0
+    cache.close()